@@ -1,5 +1,9 @@
 import pandas as pd
-from shapely.geometry import Point, shape
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import shape
+from Tracer import traced
 
 class Analyser:
     def __init__(self):
@@ -28,7 +32,7 @@ class Analyser:
         """
 
         if pd.notna(row["source_category"]) and pd.notna(row["source_type"]) and pd.notna(row["access_route"]) and pd.notna(row['speaker_number_type']):
-            row["source_confidence"] = round(self.SOURCE_CONFIDENCE_DICT['source_category'][row["source_category"]] * self.source_confidence_dict['source_type'][row["source_type"]] * self.source_confidence_dict['access_route'][row["access_route"]] * self.source_confidence_dict['speaker_number_type'][row['speaker_number_type']],2)
+            row["source_confidence"] = round(self.SOURCE_CONFIDENCE_DICT['source_category'][row["source_category"]] * self.SOURCE_CONFIDENCE_DICT['source_type'][row["source_type"]] * self.SOURCE_CONFIDENCE_DICT['access_route'][row["access_route"]] * self.SOURCE_CONFIDENCE_DICT['speaker_number_type'][row['speaker_number_type']],2)
         else:
             row["source_confidence"] = None
         return row
@@ -48,7 +52,7 @@ class Analyser:
             row['speaker_number_max'] = row['speaker_number_numeric'] * (1+ one_minus_confidence)
 
         elif  row['speaker_number_type'] == 'qualitative range':
-            row['speaker_number_max'] = row['speaker_number_max'] * (1+ one_minus_confidence)
+            row['speaker_number_max'] = row['speaker_number_numeric'] * (1+ one_minus_confidence)
 
         elif row['vitality_status'] == 'extinct' or row['vitality_status'] == 'dormant':
             row['speaker_number_min'] = 0
@@ -56,38 +60,75 @@ class Analyser:
 
         return row
 
+    def calculate_source_confidences(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''Vectorised version of calculate_source_confidence: maps each categorical column through its
+        SOURCE_CONFIDENCE_DICT weights and multiplies the weights as arrays.
+        Rows with a missing (or unknown) category get no confidence score.'''
+        confidence = pd.Series(1.0, index=df.index)
+        for column, weights in self.SOURCE_CONFIDENCE_DICT.items():
+            confidence = confidence * df[column].map(weights).astype(float)
+        df["source_confidence"] = confidence.round(2)
+        return df
+
+    def calculate_min_and_max_bounds(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''Vectorised version of calculate_min_and_max_for_all_except_range, using np.select with the same
+        conditions in the same order. Rows matching no condition (e.g. explicit ranges) keep their bounds.
+        The bounds are computed from speaker_number_numeric only (for qualitative ranges, the stated limit), never from
+        the previous bounds, so deriving an already-derived frame again gives the same result.'''
+        speaker_number_type = df["speaker_number_type"]
+        numeric = pd.to_numeric(df["speaker_number_numeric"], errors="coerce")
+        current_min = pd.to_numeric(df["speaker_number_min"], errors="coerce")
+        current_max = pd.to_numeric(df["speaker_number_max"], errors="coerce")
+        confidence = pd.to_numeric(df["source_confidence"], errors="coerce")
+        one_minus_confidence = 1 - confidence
+
+        conditions = [
+            speaker_number_type == "exact",
+            speaker_number_type.isin(["estimate", "qualitative estimate"]),
+            speaker_number_type == "qualitative range",
+            df["vitality_status"].isin(["extinct", "dormant"]),
+        ]
+        df["speaker_number_min"] = np.select(conditions, [numeric, numeric * confidence, 0, 0], default=current_min)
+        df["speaker_number_max"] = np.select(conditions, [numeric, numeric * (1 + one_minus_confidence), numeric * (1 + one_minus_confidence), 0], default=current_max)
+        return df
+
+    @traced()
+    def create_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''Builds every derived column from the cleaned speaker numbers in one pass:
+        source_confidence, speaker number bounds, plotting_data and bar_chart_tooltip_value.'''
+        df = df.copy()
+        df = self.calculate_source_confidences(df)
+        df = self.create_plotting_data_column(df)
+        df = self.create_tooltip_column_for_barchart(df)
+        return df
+
+    @traced()
     def build_province_language_mapping(self, boundaries_data: dict, language_df: pd.DataFrame) -> pd.DataFrame:
         '''This function builds a mapping of provinces to the number of languages spoken in each province.
+        -Assigns every language to its province(s) with one bulk point-in-polygon query against an STRtree of the province polygons.
         -OUTPUT: DataFrame with columns 'Province', 'Number of Languages', 'Languages List'''
 
-        df = pd.DataFrame(columns=['Province', 'Number of Languages', 'Languages List'])
-        for feature in boundaries_data['features']:
-                polygon = shape(feature['geometry'])
-                for _, row in language_df.iterrows():
-                    language = row['language']
-                    longitude = row['longitude']
-                    latitude = row['latitude']
-                    point = Point(longitude, latitude) 
-                    if polygon.contains(point):
-                        if feature['properties']['shapeName'] not in df['Province'].values:
-                            new_row =pd.DataFrame([{
-                                'Province': feature['properties']['shapeName'],
-                                'Number of Languages': 0,
-                                'Languages List': []
-                            }])
-                            df = pd.concat([df, new_row], ignore_index=True)
-                        province_index = df.index[df['Province'] == feature['properties']['shapeName']][0]
-                        df.at[province_index, "Number of Languages"] += 1
-                        df.at[province_index, "Languages List"].append(language)    
-                            
-                    else:
-                        continue
+        polygons = [shape(feature['geometry']) for feature in boundaries_data['features']]
+        province_names = [feature['properties']['shapeName'] for feature in boundaries_data['features']]
+        points = shapely.points(language_df['longitude'].to_numpy(dtype=float), language_df['latitude'].to_numpy(dtype=float))
+
+        point_indices, polygon_indices = STRtree(polygons).query(points, predicate='within')
+        matches = pd.DataFrame({
+            'polygon_index': polygon_indices,
+            'point_index': point_indices,
+            'language': language_df['language'].to_numpy()[point_indices],
+        }).sort_values(['polygon_index', 'point_index'])
+        matches['Province'] = [province_names[index] for index in matches['polygon_index']]
+
+        df = matches.groupby('Province', sort=False)['language'].agg(list).reset_index(name='Languages List')
+        df.insert(1, 'Number of Languages', df['Languages List'].str.len())
         return df
     
+    @traced()
     def create_plotting_data_column(self, df: pd.DataFrame) -> pd.DataFrame:
         '''Creates a plotting data column for the dataframe. 
         Used for visualisations where a single numerical value is required for each language, e.g., bar charts'''
-        df = df.apply(self.calculate_min_and_max_for_all_except_range, axis=1)
+        df = self.calculate_min_and_max_bounds(df)
         df["plotting_data"] = None 
         df["speaker_number_min"] = pd.to_numeric(df["speaker_number_min"], errors="coerce")
         df["speaker_number_max"] = pd.to_numeric(df["speaker_number_max"], errors="coerce")
@@ -101,13 +142,13 @@ class Analyser:
         df.loc[df["speaker_number_type"] == "qualitative range", "plotting_data"] = (
         (df["speaker_number_min"] + df["speaker_number_max"])/ 2)
 
-        # Case 2: extinct or dormant → value below minimum
-        df.loc[df["vitality_status"].isin(["extinct", "dormant"]), "plotting_data"] = df["speaker_number_numeric"].min()-0.5
-        
-        # Case 3: exact → numeric
+        # Case 2: exact → numeric
         df.loc[df["speaker_number_type"] == "estimate", "plotting_data"] = df["speaker_number_numeric"]
         df.loc[df["speaker_number_type"] == "exact", "plotting_data"] = df["speaker_number_numeric"]
         df.loc[df["speaker_number_type"] == "qualitative estimate", "plotting_data"] = df["speaker_number_numeric"]
+
+        # Case 3: extinct or dormant → value just below the smallest speaker number in the whole dataset, whatever their type
+        df.loc[df["vitality_status"].isin(["extinct", "dormant"]), "plotting_data"] = df["speaker_number_numeric"].min()-0.5
     
     
         return df
@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+import shapely
+from shapely.geometry import shape, mapping
+
+try:
+    import topojson
+except ImportError:
+    topojson = None
+
+class BoundaryPreparer:
+    def __init__(self, cache_dir: str = "cache/boundaries", tolerance: float = 0.005, precision: int = 4):
+        '''Prepares province boundaries for display: simplified polygons with quantized coordinates, cached on disk.
+        -tolerance: Douglas-Peucker tolerance in degrees (0.005 is roughly 500 m, finer than a pixel at the dashboard's zoom).
+        -precision: decimal places kept per coordinate (4 is roughly 11 m).
+        Only the map uses the prepared file; point-in-polygon assignment keeps the full resolution boundaries.'''
+        self.cache_dir = Path(cache_dir)
+        self.tolerance = tolerance
+        self.precision = precision
+        self.TOPOJSON_OBJECT_NAME = "boundaries"
+
+    def cache_path(self, source_path: str, output_format: str) -> Path:
+        '''Cache file for the source and settings. The source's mtime and size are part of the key, so editing it invalidates the cache.'''
+        stat = os.stat(source_path)
+        key = json.dumps([os.path.basename(source_path), stat.st_mtime, stat.st_size, self.tolerance, self.precision, output_format, "coverage"])
+        extension = "topojson" if output_format == "topojson" else "geojson"
+        return self.cache_dir / f"{Path(source_path).stem}.{hashlib.md5(key.encode('utf-8')).hexdigest()[:12]}.{extension}"
+
+    def simplify_geometries(self, geo_data: dict) -> dict:
+        '''Returns a copy of the FeatureCollection with every geometry simplified and its coordinates rounded; properties are kept.
+        The provinces are simplified as a coverage: each border shared by two provinces is simplified once, so neighbours
+        keep matching edges instead of opening gaps and slivers between them.'''
+        geometries = np.array([shape(feature['geometry']) for feature in geo_data['features']])
+        geometries = shapely.coverage_simplify(geometries, self.tolerance)
+        geometries = shapely.set_precision(geometries, 10 ** -self.precision)
+        # set_precision snaps to the grid but leaves float noise such as 155.71080000000001 in the JSON
+        geometries = shapely.transform(geometries, lambda coordinates: np.round(coordinates, self.precision))
+        features = [
+            {'type': 'Feature', 'properties': dict(feature['properties']), 'geometry': mapping(geometry)}
+            for feature, geometry in zip(geo_data['features'], geometries)
+        ]
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def convert_to_topojson(self, geo_data: dict) -> dict:
+        '''Converts a FeatureCollection to TopoJSON, so borders shared by two provinces are stored once.'''
+        if topojson is None:
+            raise ImportError("TopoJSON output requires the topojson package.")
+        topology = topojson.Topology(geo_data, object_name=self.TOPOJSON_OBJECT_NAME, prequantize=False)
+        return json.loads(topology.to_json())
+
+    def prepare(self, source_path: str, output_format: str = "geojson") -> dict:
+        """
+        Loads the prepared boundaries from the cache, or builds and caches them.
+
+        Args:
+            source_path (str): Path to the full resolution GeoJSON.
+            output_format (str, optional): "geojson" or "topojson". Defaults to "geojson".
+
+        Returns:
+            dict: The simplified FeatureCollection, or a TopoJSON topology whose object is named TOPOJSON_OBJECT_NAME.
+        """
+        if output_format not in ("geojson", "topojson"):
+            raise ValueError(f"Unknown boundary format: {output_format}")
+        path = self.cache_path(source_path, output_format)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+
+        with open(source_path, 'r', encoding='utf-8') as file:
+            prepared = self.simplify_geometries(json.load(file))
+        if output_format == "topojson":
+            prepared = self.convert_to_topojson(prepared)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale_path in self.cache_dir.glob(f"{Path(source_path).stem}.*.{path.suffix.lstrip('.')}"):
+            stale_path.unlink()
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(prepared, file, separators=(',', ':'))
+        return prepared
+
+    def summarise(self, geo_data: dict) -> dict:
+        '''Returns the vertex count and the serialized size in bytes of a FeatureCollection or TopoJSON topology.'''
+        if geo_data.get('type') == 'Topology':
+            vertices = sum(len(arc) for arc in geo_data['arcs'])
+        else:
+            vertices = int(shapely.get_num_coordinates([shape(feature['geometry']) for feature in geo_data['features']]).sum())
+        return {'vertices': vertices, 'bytes': len(json.dumps(geo_data, separators=(',', ':')).encode('utf-8'))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplify and quantize the province boundaries for the choropleth, and report the savings.")
+    parser.add_argument("--source", default="data/geoBoundaries-PNG-ADM1.geojson")
+    parser.add_argument("--cache-dir", default="cache/boundaries")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Simplification tolerance in degrees.")
+    parser.add_argument("--precision", type=int, default=4, help="Decimal places kept per coordinate.")
+    parser.add_argument("--format", choices=["geojson", "topojson"], default="geojson")
+    args = parser.parse_args()
+
+    boundary_preparer = BoundaryPreparer(args.cache_dir, args.tolerance, args.precision)
+    with open(args.source, 'r', encoding='utf-8') as file:
+        before = boundary_preparer.summarise(json.load(file))
+    after = boundary_preparer.summarise(boundary_preparer.prepare(args.source, args.format))
+    print(f"Prepared {boundary_preparer.cache_path(args.source, args.format)}")
+    print(f"vertices: {before['vertices']} -> {after['vertices']} ({after['vertices'] / before['vertices']:.1%})")
+    print(f"bytes: {before['bytes']} -> {after['bytes']} ({after['bytes'] / before['bytes']:.1%})")
+
+if __name__ == "__main__":
+    main()
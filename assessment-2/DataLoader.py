@@ -1,36 +1,59 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import ast
+import os
 import json
 from dataclasses import asdict
-from bs4 import BeautifulSoup
-import requests
-import hashlib
 import csv
-from pathlib import Path
-import time
-from Result import Result
-from requests.exceptions import ReadTimeout, RequestException
 from LanguageEntry import LanguageEntry
+from Tracer import traced
 class DataLoader:
     def __init__(self):
-        self.HEADERS =  {
-                        "User-Agent": (
-                        "PapuanLanguagesResearchBot/1.0 "
-                        "(academic research, non-commercial; "
-                        "contact: ec25777@qmul.ac.uk)"
-                        ),
-                        "Accept-Language": "en",
-                        "Accept": "text/html"
-                        }
+        self.CATEGORICAL_COLUMNS = ['speaker_number_type', 'source_category', 'source_type', 'access_route', 'vitality_status']
+        self.LIST_COLUMN_TYPES = {
+            'links': pa.list_(pa.struct([('url', pa.string()), ('label', pa.string())])),
+            'source_urls': pa.list_(pa.string()),
+        }
 
+    @traced()
     def load_data_from_json(self, data_address: str) -> dict:
         '''Loads data in dictionary form from a JSON file located at data_address.'''
         with open(data_address, 'r') as file:
             data = json.load(file)
         return data
 
+    @traced()
     def load_data_from_csv(self, data_address: str) -> pd.DataFrame:
         df = pd.read_csv(data_address)
         return df
+
+    @traced()
+    def load_data_from_parquet(self, data_address: str, skip_list_columns: bool = False) -> pd.DataFrame:
+        '''Loads a dataset written by write_df_to_parquet. The categorical columns come back as categoricals and
+        links/source_urls as arrays (of {'url', 'label'} dicts and of URLs respectively).
+        -skip_list_columns: leaves out links and source_urls, which account for most of the load time, when they are not needed.'''
+        columns = None
+        if skip_list_columns:
+            columns = [column for column in pq.read_schema(data_address).names if column not in self.LIST_COLUMN_TYPES]
+        return pd.read_parquet(data_address, columns=columns)
+
+    def load_dataset(self, data_address: str, skip_list_columns: bool = False) -> pd.DataFrame:
+        '''Loads a language dataset from Parquet or CSV, depending on the file extension.'''
+        if data_address.endswith('.parquet'):
+            return self.load_data_from_parquet(data_address, skip_list_columns)
+        return self.load_data_from_csv(data_address)
+
+    def parse_list_column(self, values: pd.Series) -> pd.Series:
+        '''Turns a column of stringified Python lists (as stored in the CSV files) into lists. Lists and arrays are
+        converted to lists and missing values become None.'''
+        def parse(value):
+            if isinstance(value, str):
+                return ast.literal_eval(value)
+            if value is None or (isinstance(value, float) and pd.isna(value)):
+                return None
+            return list(value)
+        return values.map(parse).astype(object)
     
     def add_new_row_to_csv_file(self, entry: LanguageEntry, file_path: str) -> pd.DataFrame:
         '''Adds a new row to the DataFrame and writes the updated DataFrame to a CSV file.'''
@@ -41,173 +64,58 @@ class DataLoader:
         writer.writerow(entry)
 
     
-    def cache_path(self, url:str):
-        '''Generates a cache file path based on the MD5 hash of the URL.'''
-        url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
-        cache_file = Path("cache") / f"{url_hash}.html"
-        return cache_file
-    
+    @traced()
     def write_df_to_csv(self, df: pd.DataFrame, file_path: str):
+        list_columns = [column for column in self.LIST_COLUMN_TYPES if column in df.columns]
+        if list_columns:
+            # arrays loaded from Parquet would otherwise be written in numpy's repr, which ast.literal_eval cannot read back
+            df = df.assign(**{column: self.parse_list_column(df[column]) for column in list_columns})
         df.to_csv(file_path, index=False)
-    
-    def get_page(self, url, retries: int = 3, timeout: int = 30) -> str:
-        '''Retrieves HTML content from a URL, using
-         caching to avoid redundant network requests.
-         If the page has been accessed before,
-         the cached version is used. If it is the first
-         time, the page is cached and then used.'''
-        
-        cached_file = self.cache_path(url)
-
-        if cached_file.exists():
-            with open(cached_file, 'r', encoding='utf-8') as file:
-                html_content = file.read()
-            return html_content
-        
-        for attempt in range(retries):
-            try:
-                response = requests.get(url, headers = self.HEADERS, timeout = timeout)
-                response.raise_for_status()
-                html_content = response.text
-                with open(cached_file, 'w', encoding='utf-8') as file:
-                    file.write(html_content)
-                return html_content
-            except ReadTimeout:
-                print(f"Timeout occurred for {url}. Retrying {attempt + 1}/{retries}...")
-                time.sleep(2)  # brief pause before retrying
-            except RequestException as e:
-                print(f"Request failed for {url}: {e}")
-                time.sleep(2)
-        print(f"Failed to retrieve {url} after {retries} attempts.")
-        return None
-          
-    def orchestrate_data_scraping_per_domain_name(self, df: pd.DataFrame, domain_name: str, speaker_number_html_field: str, source_category: str, source_type: str, access_route: str, attribute1: str = None, attribute2: str = None, string_expression: str = None, method_called_after_label_identified: str= None, preference_list: list = ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org']) -> pd.DataFrame:
-        """
-        Orchestrates the scraping of speaker number data for a specific domain name from a DataFrame of languages.
-
-        Args:
-            df (pd.DataFrame): DataFrame containing language data, including 'language' and 'links' columns.
-            domain_name (str): The domain name to prioritize for scraping.
-            speaker_number_html_field (str): HTML class field to locate speaker number data.
-            source_category (str): Category of the data source.
-            source_type (str): Type of the data source.
-            access_route (str): Route used to access the data source.
-            attribute1 (str, optional): Primary HTML tag for filtering. Defaults to None.
-            attribute2 (str, optional): Secondary HTML attribute for filtering. Defaults to None.
-            string_expression (str, optional): String expression to refine the search. Defaults to None.
-            method_called_after_label_identified (str, optional): Method to call on the identified label. Defaults to None.
-            preference_list (list, optional): Ordered list of preferred domains for scraping. Defaults to ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org'].
-
-        Processes:
-            - Iterates through each row in the DataFrame.
-            - Checks if the domain name is present in the links for each language.
-            - Scrapes speaker number data from the specified domain if it is higher in the preference list or no source is set.
-            - Updates the result dictionary with scraped data, source URLs, and the domain name."""
-
-        list_of_languages_without_speaker_number = df['language'].tolist()
-        results_list = []
-
-        for row in df.itertuples():
-            result = Result()
-            result = asdict(result)
-            result["language"] = row.language  
-
-            for link in row.links:
-                url = link['url']         
-                if domain_name in url and (preference_list.index(result["speaker_source"])>preference_list.index(domain_name) or result["speaker_source"] == None):
-                    result["speaker_number_raw"] = self.scrape_data_in_class_field_from_website(url, html_class_field = speaker_number_html_field, string_expression= string_expression, attribute1 = attribute1, attribute2 = attribute2, method_called_after_label_identified= method_called_after_label_identified)
-                    result["source_urls"].clear()
-                    result["source_urls"].append(url)
-                    result["speaker_source"] = domain_name
-                    result["source_category"] = source_category
-                    result["source_type"] = source_type
-                    result["access_route"] = access_route
-                    
-            if result["speaker_number_raw"]: 
-                list_of_languages_without_speaker_number.remove(row.language) 
 
-            if result["speaker_number_raw"] == "Extinct":
-                result = self.fill_columns_based_on_language_vitality("extinct", result)
-
-            elif result["speaker_number_raw"] == "Dormant":
-                result = self.fill_columns_based_on_language_vitality("dormant", result)
-
-            results_list.append(result)
-            speaker_data_df = pd.DataFrame(results_list)
-            final_df = self.left_merge_data_frames(df, speaker_data_df)
-        return final_df, list_of_languages_without_speaker_number
-      
-    def fill_columns_based_on_language_vitality(self, vitality_label:str, result_dict: dict) -> dict:
-        '''Fills the result dictionary with specific values based on the language vitality status.'''
-        result_dict["vitality_status"] = vitality_label.lower()
-        result_dict["speaker_number_raw"] = None
-        result_dict["speaker_number_numeric"] = None
-        return result_dict
-    
-    def left_merge_data_frames(self, df1: pd.DataFrame, df2: pd.DataFrame) -> pd.DataFrame:
-        merged_df = pd.merge(df1, df2, how='left')
-        return merged_df #write to file
-        
-    def scrape_data_in_class_field_from_website(self, url: str, html_class_field: str = None, string_expression: str= None, attribute1: str = "div", attribute2: str = None, method_called_after_label_identified: str= None) -> dict:
+    @traced()
+    def write_df_to_parquet(self, df: pd.DataFrame, file_path: str):
         """
-        Scrapes data from a webpage based on specified HTML attributes and class fields.
+        Writes a language dataset to Parquet with typed columns: links as a list of {url, label} structs,
+        source_urls as a list of strings and the low-cardinality label columns as categoricals.
 
         Args:
-            url (str): The URL of the webpage to scrape.
-            html_class_field (str, optional): The HTML class to locate the target element. Defaults to None.
-            string_expression (str, optional): A string expression to refine the search. Defaults to None.
-            attribute1 (str, optional): The primary HTML tag to search for. Defaults to "div".
-            attribute2 (str, optional): A secondary HTML attribute for further filtering. Defaults to None.
-            method_called_after_label_identified (str, optional): A method to call on the identified label (e.g., "find_next_sibling"). Defaults to None.
-
-        Returns:
-            dict: A dictionary containing the scraped data or a status string ("Extinct" or "Dormant") if specific keywords are found.
+            df (pd.DataFrame): Dataset to write. List columns may hold lists or stringified lists (as read from a CSV).
+            file_path (str): Path of the Parquet file.
         """
-
-        CACHE_DIR = Path("cache")
-        CACHE_DIR.mkdir(exist_ok=True)
-        self.cache_path(url)
-
-        try:
-            html = self.get_page(url)
-            soup = BeautifulSoup(html, 'html.parser')
-
-            if self.check_for_word_in_text('extinct', soup):
-                return "Extinct"
-            
-            elif self.check_for_word_in_text('dormant', soup):
-                return "Dormant"
-            
-            if string_expression is None:
-                label = soup.find(attribute1, class_ = html_class_field)
-
-            elif method_called_after_label_identified == "find_next_sibling":
-                label = None
-                if attribute2 is None:
-                    attribute2 = attribute1
-                for attr in soup.find_all(attribute1, class_=html_class_field):
-                    if string_expression in attr.get_text():
-                        label = attr
-                        next_sibling_html = label.find_next_sibling(attribute2)
-                        speaker_number_raw = next_sibling_html.text.strip()
-                        return speaker_number_raw
-                    
-            if not label:
-                return None
-            
-            speaker_number_raw = label.text.strip()
-            return speaker_number_raw
-        
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            return None
-    
-    def check_for_word_in_text(self, word:str, soup: str) -> bool:
-        word = word.lower()
-        word_present = soup.find(string=lambda text: word in text.lower())
-        if word_present:
-            return True
-        return False
-    
-        
-        
\ No newline at end of file
+        df = df.copy()
+        for column in self.CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        list_columns = [column for column in self.LIST_COLUMN_TYPES if column in df.columns]
+        for column in list_columns:
+            df[column] = self.parse_list_column(df[column])
+        for column in df.columns.difference(list_columns):
+            if df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) in ('mixed', 'mixed-integer'):
+                # e.g. bar_chart_tooltip_value holds raw speaker strings and exact numbers; stored as text, like a CSV round trip would
+                df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+        table = pa.Table.from_pandas(df.drop(columns=list_columns), preserve_index=False)
+        for column in list_columns:
+            table = table.add_column(df.columns.get_loc(column), column, pa.array(df[column], type=self.LIST_COLUMN_TYPES[column]))
+        # written next to the target and swapped in, so a dashboard reading the file never sees it half-written
+        temporary_path = f"{file_path}.tmp-{os.getpid()}"
+        pq.write_table(table, temporary_path, compression='zstd')
+        os.replace(temporary_path, file_path)
+
+    def write_dataset(self, df: pd.DataFrame, file_path: str):
+        '''Writes a language dataset to Parquet or CSV, depending on the file extension.'''
+        if file_path.endswith('.parquet'):
+            self.write_df_to_parquet(df, file_path)
+        else:
+            self.write_df_to_csv(df, file_path)
+
+    @traced()
+    def migrate_csv_to_parquet(self, csv_path: str, parquet_path: str = None, overwrite: bool = False) -> str:
+        '''Converts a CSV dataset to Parquet next to it (same name, .parquet) if the Parquet file is missing, or always with overwrite.
+        File times are not compared: a checkout or touch of the CSV must not replace a Parquet file written by the pipeline.
+        Returns the Parquet path, so callers can always load from it.'''
+        if parquet_path is None:
+            parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+        if overwrite or not os.path.exists(parquet_path):
+            print(f"Migrating {csv_path} to {parquet_path}...")
+            self.write_df_to_parquet(self.load_data_from_csv(csv_path), parquet_path)
+        return parquet_path
@@ -0,0 +1,140 @@
+import time
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+class Extractor:
+    '''Base class for the HTML extraction backends used by Scraper.scrape_data_in_class_field_from_website.
+    Subclasses implement parse, get_text, find_by_class and find_next_sibling for their parser library.'''
+    BACKEND = None
+
+    def __init__(self):
+        self.VITALITY_KEYWORDS = ['extinct', 'dormant']
+
+    def extract(self, html: str, domain: str = None, html_class_field: str = None, string_expression: str = None, attribute1: str = None, attribute2: str = None, method_called_after_label_identified: str = None, parse_times: dict = None) -> str:
+        """
+        Extracts the raw speaker number (or a vitality status) from a page.
+
+        Args:
+            html (str): HTML content of the page.
+            domain (str, optional): Domain the page came from; the parse time is recorded against it. Defaults to None.
+            html_class_field (str, optional): The HTML class to locate the target element. Defaults to None.
+            string_expression (str, optional): Text of the label element when the class locates a label. Defaults to None.
+            attribute1 (str, optional): The HTML tag carrying the class (None matches any tag). Defaults to None.
+            attribute2 (str, optional): The HTML tag of the value next to the label. Defaults to attribute1.
+            method_called_after_label_identified (str, optional): Only "find_next_sibling" is supported. Defaults to None.
+            parse_times (dict, optional): Domain -> list of parse times in seconds, owned by the caller (e.g. one scrape);
+                the time of this page is appended to it. Defaults to None (not timed).
+
+        Returns:
+            str: The stripped text of the target element, "Extinct" or "Dormant" if the page mentions either word, or None.
+        """
+        start = time.perf_counter()
+        try:
+            document = self.parse(html)
+            text = self.get_text(document).lower()
+            for keyword in self.VITALITY_KEYWORDS:
+                if keyword in text:
+                    return keyword.capitalize()
+
+            if string_expression is None:
+                labels = self.find_by_class(document, attribute1, html_class_field)
+                if not labels:
+                    return None
+                return self.get_text(labels[0]).strip()
+
+            if method_called_after_label_identified == "find_next_sibling":
+                if attribute2 is None:
+                    attribute2 = attribute1
+                for label in self.find_by_class(document, attribute1, html_class_field):
+                    if string_expression in self.get_text(label):
+                        next_sibling = self.find_next_sibling(label, attribute2)
+                        if next_sibling is None:
+                            raise ValueError(f"No <{attribute2}> found after the '{string_expression}' label")
+                        return self.get_text(next_sibling).strip()
+            return None
+        finally:
+            if parse_times is not None:
+                parse_times.setdefault(domain, []).append(time.perf_counter() - start)
+
+    def summarise_parse_times(self, parse_times: dict) -> dict:
+        '''Returns the number of pages, and the total, mean and maximum parse time in seconds, per domain of parse_times.'''
+        summary = {}
+        for domain, times in parse_times.items():
+            summary[domain] = {'pages': len(times), 'total': sum(times), 'mean': sum(times) / len(times), 'max': max(times)}
+        return summary
+
+    def print_parse_time_summary(self, parse_times: dict):
+        for domain, stats in self.summarise_parse_times(parse_times).items():
+            print(f"{domain} ({self.BACKEND}): {stats['pages']} pages parsed in {stats['total']:.2f}s (mean {stats['mean'] * 1000:.1f}ms, max {stats['max'] * 1000:.1f}ms)")
+
+
+class BeautifulSoupExtractor(Extractor):
+    '''Backend using BeautifulSoup with Python's built-in html.parser; always available.'''
+    BACKEND = "html.parser"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+
+    def get_text(self, node) -> str:
+        if isinstance(node, BeautifulSoup):
+            # every string in the document, including scripts and comments
+            return "\n".join(node.find_all(string=True))
+        return node.get_text()
+
+    def find_by_class(self, document, tag: str, html_class_field: str) -> list:
+        return document.find_all(tag, class_=html_class_field)
+
+    def find_next_sibling(self, node, tag: str):
+        return node.find_next_sibling(tag)
+
+
+class LxmlExtractor(Extractor):
+    '''Backend using lxml's C HTML parser, with XPath selectors compiled once per (tag, class) pair.'''
+    BACKEND = "lxml"
+
+    def __init__(self):
+        super().__init__()
+        self.parser = lxml_html.HTMLParser(encoding='utf-8')
+        self.compiled_selectors = {}
+
+    def compile_selector(self, xpath: str):
+        if xpath not in self.compiled_selectors:
+            self.compiled_selectors[xpath] = etree.XPath(xpath)
+        return self.compiled_selectors[xpath]
+
+    def parse(self, html: str):
+        return lxml_html.document_fromstring(html.encode('utf-8'), parser=self.parser)
+
+    def get_text(self, node) -> str:
+        if node.getparent() is None:
+            # every string in the document, including scripts and comments
+            strings = self.compile_selector("//text()")(node)
+            comments = [comment.text or "" for comment in self.compile_selector("//comment()")(node)]
+            return "\n".join(strings + comments)
+        return node.text_content()
+
+    def find_by_class(self, document, tag: str, html_class_field: str) -> list:
+        xpath = f"//{tag or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {html_class_field} ')]"
+        return self.compile_selector(xpath)(document)
+
+    def find_next_sibling(self, node, tag: str):
+        siblings = self.compile_selector(f"following-sibling::{tag or '*'}[1]")(node)
+        return siblings[0] if siblings else None
+
+
+def create_extractor(backend: str = None) -> Extractor:
+    '''Returns an extractor for the requested backend ("lxml" or "html.parser").
+    With no backend given, lxml is used when it is installed and html.parser otherwise.'''
+    if backend is None:
+        backend = "lxml" if lxml_html is not None else "html.parser"
+    if backend == "lxml":
+        if lxml_html is None:
+            raise ImportError("The lxml extraction backend requires the lxml package.")
+        return LxmlExtractor()
+    if backend == "html.parser":
+        return BeautifulSoupExtractor()
+    raise ValueError(f"Unknown extraction backend: {backend}")
@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import asdict
+import pandas as pd
+from DataLoader import DataLoader
+from Scraper import Scraper
+from Processor import Processor
+from Analyser import Analyser
+from ScrapingConfig import DEFAULT_SCRAPING_CONFIGS
+
+class IncrementalScraper:
+    def __init__(self, data_loader: DataLoader, scraper: Scraper, processor: Processor, analyser: Analyser, scraping_configs: list = DEFAULT_SCRAPING_CONFIGS, preference_list: list = ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org']):
+        '''Re-scrapes, cleans and re-derives only the languages whose inputs changed since the last run.
+        A language's inputs are its links, the cached pages it may be scraped from (the most preferred one and its fallbacks)
+        and the extractor configs used on them;
+        a fingerprint of each is stored in a JSON manifest next to the dataset.'''
+        self.data_loader = data_loader
+        self.scraper = scraper
+        self.processor = processor
+        self.analyser = analyser
+        self.scraping_configs = scraping_configs
+        self.preference_list = preference_list
+        self.SCRAPED_COLUMNS = ['speaker_number_raw', 'speaker_number_numeric', 'speaker_number_type', 'speaker_number_min', 'speaker_number_max',
+                                'vitality_status', 'vitality_certainty', 'speaker_number_year', 'speaker_source', 'source_category',
+                                'source_type', 'access_route', 'source_urls',
+                                'source_confidence', 'plotting_data', 'bar_chart_tooltip_value']
+
+    def hash_value(self, value) -> str:
+        return hashlib.md5(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def load_fingerprints(self, manifest_path: str) -> dict:
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+
+    def save_fingerprints(self, fingerprints: dict, manifest_path: str):
+        with open(manifest_path, 'w') as file:
+            json.dump(fingerprints, file, indent=1, sort_keys=True)
+
+    def fingerprint_language(self, links: list, jobs: list, page_hashes: dict) -> dict:
+        '''Returns the fingerprint of one language from its planned scraping jobs and the hashes of the cached pages.
+        Every page the scrape may use is part of it (the most preferred one and its fallbacks), as a change to a fallback
+        page can change the result.'''
+        fingerprint = {'links': self.hash_value(links), 'pages': [page_hashes.get(url) for url, _ in jobs], 'config': None}
+        if jobs:
+            fingerprint['config'] = self.hash_value([[asdict(scraping_config) for _, scraping_config in jobs], self.preference_list])
+        return fingerprint
+
+    def hash_pages(self, urls: list, revalidate: bool = False) -> tuple:
+        '''Brings the pages up to date in the cache and hashes each of them once.
+        Missing and expired pages (or, with revalidate, all of them) are fetched concurrently first.
+        Returns (dict of URL to MD5 of the page (None if it could not be retrieved), number of pages downloaded because
+        they were missing or expired).'''
+        page_cache = self.scraper.get_page_cache()
+        stale_urls = []
+        for url in urls:
+            entry = page_cache.get_entry(url)
+            if entry is None or page_cache.is_expired(entry['fetched_at']):
+                stale_urls.append(url)
+        fetched_pages = {}
+        if revalidate:
+            fetched_pages = self.scraper.fetch_pages_concurrently(urls, revalidate=True)
+        elif stale_urls:
+            fetched_pages = self.scraper.fetch_pages_concurrently(stale_urls)
+        page_hashes = {}
+        for url in urls:
+            html = fetched_pages[url] if url in fetched_pages else page_cache.get(url)
+            page_hashes[url] = hashlib.md5(html.encode('utf-8')).hexdigest() if html is not None else None
+        page_cache.flush_access_times()
+        fetched_count = sum(fetched_pages.get(url) is not None for url in stale_urls)
+        return page_hashes, fetched_count
+
+    def run(self, language_location_df: pd.DataFrame, dataset_path: str, manifest_path: str, revalidate: bool = False) -> pd.DataFrame:
+        """
+        Patches the rows of the dataset whose inputs changed and leaves every other row untouched.
+
+        Args:
+            language_location_df (pd.DataFrame): Output of Processor.create_language_location_df (links as lists).
+            dataset_path (str): Parquet or CSV dataset to patch, e.g. data/language_speaker_data_clean.parquet. Only languages already in it are considered.
+            manifest_path (str): JSON file holding the fingerprints from the previous run.
+            revalidate (bool, optional): If True, cached pages are revalidated with conditional GETs first. Defaults to False.
+
+        Returns:
+            pd.DataFrame: The patched dataset (also written back to dataset_path).
+        """
+        dataset = self.data_loader.load_dataset(dataset_path)
+        previous_fingerprints = self.load_fingerprints(manifest_path)
+        language_location_df = language_location_df[language_location_df['language_ID'].isin(dataset['language_ID'])]
+
+        planned_jobs = {}
+        for language_ID, links in zip(language_location_df['language_ID'], language_location_df['links']):
+            planned_jobs[language_ID] = (links, self.scraper.plan_scraping_jobs(links, self.scraping_configs, self.preference_list))
+        urls = list(dict.fromkeys(url for _, jobs in planned_jobs.values() for url, _ in jobs))
+        page_hashes, fetched_count = self.hash_pages(urls, revalidate=revalidate)
+
+        fingerprints = {}
+        changed_ids = []
+        for language_ID, (links, jobs) in planned_jobs.items():
+            fingerprint = self.fingerprint_language(links, jobs, page_hashes)
+            fingerprints[language_ID] = fingerprint
+            # a page that was downloaded or changed on revalidation has a new hash, so its languages show up here
+            if previous_fingerprints.get(language_ID) != fingerprint:
+                changed_ids.append(language_ID)
+
+        if changed_ids:
+            changed_df = language_location_df[language_location_df['language_ID'].isin(changed_ids)]
+            scraped_df, _, _ = self.scraper.orchestrate_data_scraping(changed_df, self.scraping_configs, preference_list=self.preference_list)
+            scraped_df = self.processor.clean_speaker_numbers(scraped_df)
+            dataset = self.patch_rows(dataset, scraped_df)
+            # derived over the whole dataset, as some columns (e.g. the plotting value of extinct languages) depend on every row
+            dataset = self.analyser.create_derived_columns(dataset)
+            self.data_loader.write_dataset(dataset, dataset_path)
+
+        self.save_fingerprints(fingerprints, manifest_path)
+        print(f"Incremental scrape: {len(fingerprints) - len(changed_ids)} rows reused, {fetched_count} pages fetched, {len(changed_ids)} rows re-extracted.")
+        return dataset
+
+    def patch_rows(self, dataset: pd.DataFrame, scraped_df: pd.DataFrame) -> pd.DataFrame:
+        '''Overwrites the scraped and cleaned columns of the matching rows in the dataset, keyed on language_ID.
+        Columns missing from scraped_df (e.g. the derived ones, rebuilt by the caller) are left as they are.'''
+        dataset = dataset.set_index('language_ID')
+        scraped_df = scraped_df.set_index('language_ID')
+        for column in ['links'] + self.SCRAPED_COLUMNS:
+            if column in dataset.columns and column in scraped_df.columns:
+                dataset[column] = dataset[column].astype(object)
+                dataset.loc[scraped_df.index, column] = scraped_df[column].astype(object).where(scraped_df[column].notna(), None)
+        return dataset.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scrape only the languages whose links, cached page or extractor config changed.")
+    parser.add_argument("--geojson", default="data/PNG_all_languages_coordinate_data.geojson")
+    parser.add_argument("--dataset", default="data/language_speaker_data_clean.parquet")
+    parser.add_argument("--manifest", default="data/scrape_fingerprints.json")
+    parser.add_argument("--revalidate", action="store_true", help="Revalidate cached pages with conditional GETs first.")
+    args = parser.parse_args()
+
+    data_loader = DataLoader()
+    processor = Processor()
+    if args.dataset.endswith('.parquet'):
+        data_loader.migrate_csv_to_parquet(os.path.splitext(args.dataset)[0] + '.csv', args.dataset)
+    language_location_df = processor.create_language_location_df(data_loader.load_data_from_json(args.geojson))
+    IncrementalScraper(data_loader, Scraper(), processor, Analyser()).run(language_location_df, args.dataset, args.manifest, revalidate=args.revalidate)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import bisect
+import unicodedata
+from collections import defaultdict
+import numpy as np
+
+class LanguageSearchIndex:
+    def __init__(self, languages, language_IDs, links=None):
+        '''Prefix and trigram index over the searchable names of each language: its name, its language_ID (glottocode)
+        and the labels of its links (e.g. dialect names such as "Fasu (Namumi Dialect)").
+        Languages are referred to by their position in the arrays passed in.
+        -links: per language, a list of {'url', 'label'} dicts (or None); labels that repeat the name are indexed once.'''
+        self.names = [name if isinstance(name, str) else "" for name in languages]
+        self.terms = [] # (normalised term, original term, language position)
+        for position, (name, language_ID) in enumerate(zip(self.names, language_IDs)):
+            labels = [name, language_ID]
+            if links is not None and links[position] is not None:
+                labels += [link.get('label') for link in links[position]]
+            seen = set()
+            for label in labels:
+                if not isinstance(label, str) or not label.strip():
+                    continue
+                normalised = self.normalise(label)
+                if normalised not in seen:
+                    seen.add(normalised)
+                    self.terms.append((normalised, label, position))
+
+        # prefix index: terms sorted by normalised text, so every term starting with a prefix is one contiguous slice
+        self.terms.sort()
+        self.sorted_terms = [term for term, _, _ in self.terms]
+        # trigram index: trigram -> ids (into self.terms) of the terms containing it
+        postings = defaultdict(list)
+        self.trigram_counts = np.zeros(len(self.terms), dtype=np.int32)
+        for term_id, (term, _, _) in enumerate(self.terms):
+            trigrams = self.trigrams(term)
+            self.trigram_counts[term_id] = len(trigrams)
+            for trigram in trigrams:
+                postings[trigram].append(term_id)
+        self.postings = {trigram: np.array(term_ids, dtype=np.int32) for trigram, term_ids in postings.items()}
+        self.MIN_TRIGRAM_SIMILARITY = 0.3
+
+    def normalise(self, text: str) -> str:
+        '''Lower case without accents and with punctuation turned into single spaces, so "Ömie" matches "omie"
+        and "Fasu (Namumi Dialect)" becomes "fasu namumi dialect".'''
+        decomposed = unicodedata.normalize('NFKD', text.lower())
+        characters = "".join(character for character in decomposed if not unicodedata.combining(character))
+        return " ".join("".join(character if character.isalnum() else " " for character in characters).split())
+
+    def trigrams(self, text: str) -> set:
+        padded = f"  {text} "
+        return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        Returns the languages best matching the query, best first.
+        A term equal to the query scores 3, a term starting with it 2, a term with a word starting with it 1.5,
+        and otherwise the trigram similarity (shared trigrams over all trigrams, kept if at least MIN_TRIGRAM_SIMILARITY).
+        Each language is ranked by its best matching term; ties are broken by name.
+
+        Args:
+            query (str): Text typed by the user.
+            limit (int, optional): Maximum number of matches. Defaults to 20.
+
+        Returns:
+            list: (position, matched term, score) tuples.
+        """
+        query = self.normalise(query)
+        if not query:
+            return []
+        best = {}
+
+        def consider(term_id: int, score: float):
+            _, label, position = self.terms[term_id]
+            if position not in best or score > best[position][1]:
+                best[position] = (label, score)
+
+        start = bisect.bisect_left(self.sorted_terms, query)
+        end = bisect.bisect_left(self.sorted_terms, query + "\uffff")
+        for term_id in range(start, end):
+            consider(term_id, 3.0 if self.sorted_terms[term_id] == query else 2.0)
+
+        query_trigrams = self.trigrams(query)
+        matching_postings = [self.postings[trigram] for trigram in query_trigrams if trigram in self.postings]
+        if matching_postings:
+            term_ids, shared = np.unique(np.concatenate(matching_postings), return_counts=True)
+            similarity = shared / (len(query_trigrams) + self.trigram_counts[term_ids] - shared)
+            for term_id, score in zip(term_ids[similarity >= self.MIN_TRIGRAM_SIMILARITY], similarity[similarity >= self.MIN_TRIGRAM_SIMILARITY]):
+                consider(term_id, float(score))
+            # a later word of the term starts with the query; such terms all contain the trigram " " + query[:2]
+            word_start = " " + query[:2]
+            if len(query) >= 2 and word_start in self.postings:
+                for term_id in self.postings[word_start]:
+                    if f" {query}" in self.sorted_terms[term_id]:
+                        consider(term_id, 1.5)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][1], self.names[item[0]]))
+        return [(position, label, score) for position, (label, score) in ranked[:limit]]
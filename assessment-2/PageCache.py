@@ -0,0 +1,261 @@
+import sqlite3
+import hashlib
+import gzip
+import threading
+import time
+import argparse
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class PageCache:
+    def __init__(self, cache_dir: str = "cache", ttl_seconds: float = None, max_size_bytes: int = None, read_only: bool = False):
+        '''On-disk page cache: one SQLite file holding an index of every cached URL and its compressed HTML.
+        -ttl_seconds: entries older than this are treated as missing (None = never expire).
+        -max_size_bytes: prune() evicts least recently used entries until the compressed size fits (None = unbounded).
+        -read_only: opens an existing store for reading only (e.g. from extraction worker processes); get() then leaves last_accessed alone.
+        Reads do not write: get() notes the access time in memory and flush_access_times() (called by set_languages, prune and close)
+        writes them all in one statement.
+        Pages from the old flat cache (cache/<md5>.html) are copied into the store when it is created; the flat files are
+        tracked in git, so they are left in place.'''
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        self.db_path = self.cache_dir / "pages.sqlite"
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.COMPRESSION = "zstd" if zstandard is not None else "gzip"
+        self.lock = threading.RLock() # re-entrant, so methods holding it can call flush_access_times
+        self.read_only = read_only
+        self.pending_access_times = {} # url_hash -> (last_accessed, url), not yet written
+        if read_only:
+            self.connection = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            return
+        is_new_store = not self.db_path.exists()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT,
+                language TEXT,
+                fetched_at REAL,
+                last_accessed REAL,
+                status INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                compressed_size INTEGER,
+                compression TEXT,
+                body BLOB
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS pages_last_accessed ON pages (last_accessed)")
+        self.connection.commit()
+        if is_new_store:
+            self.migrate_flat_directory()
+
+    def url_hash(self, url: str) -> str:
+        '''MD5 hash of the URL; the same key the flat cache used for its file names.'''
+        return hashlib.md5(url.encode('utf-8')).hexdigest()
+
+    def compress(self, html: str) -> bytes:
+        data = html.encode('utf-8')
+        if self.COMPRESSION == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def decompress(self, body: bytes, compression: str) -> str:
+        if compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError("This cache entry is zstd-compressed but the zstandard package is not installed.")
+            return zstandard.ZstdDecompressor().decompress(body).decode('utf-8')
+        return gzip.decompress(body).decode('utf-8')
+
+    def is_expired(self, fetched_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - fetched_at > self.ttl_seconds
+
+    def get(self, url: str, allow_expired: bool = False) -> str:
+        '''Returns the cached HTML for the URL, or None if it is not cached (or has expired).'''
+        url_hash = self.url_hash(url)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT fetched_at, compression, body FROM pages WHERE url_hash = ?", (url_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            fetched_at, compression, body = row
+            if not allow_expired and self.is_expired(fetched_at):
+                return None
+            if not self.read_only:
+                self.pending_access_times[url_hash] = (time.time(), url)
+        return self.decompress(body, compression)
+
+    def flush_access_times(self):
+        '''Writes the access times recorded by get() since the last flush.'''
+        with self.lock:
+            if not self.pending_access_times:
+                return
+            self.connection.executemany(
+                "UPDATE pages SET last_accessed = ?, url = COALESCE(url, ?) WHERE url_hash = ?",
+                [(last_accessed, url, url_hash) for url_hash, (last_accessed, url) in self.pending_access_times.items()]
+            )
+            self.connection.commit()
+            self.pending_access_times = {}
+
+    def get_entry(self, url: str) -> dict:
+        '''Returns the index entry (everything except the page body) for the URL, or None if it is not cached.'''
+        with self.lock:
+            cursor = self.connection.execute(
+                "SELECT url_hash, url, language, fetched_at, last_accessed, status, etag, last_modified, size, compressed_size, compression FROM pages WHERE url_hash = ?",
+                (self.url_hash(url),)
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def put(self, url: str, html: str, status: int = 200, etag: str = None, last_modified: str = None, language: str = None):
+        '''Stores (or replaces) the page for the URL together with its response metadata.'''
+        body = self.compress(html)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                """INSERT INTO pages (url_hash, url, language, fetched_at, last_accessed, status, etag, last_modified, size, compressed_size, compression, body)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url_hash) DO UPDATE SET
+                       url = excluded.url, language = COALESCE(excluded.language, pages.language),
+                       fetched_at = excluded.fetched_at, last_accessed = excluded.last_accessed,
+                       status = excluded.status, etag = excluded.etag, last_modified = excluded.last_modified,
+                       size = excluded.size, compressed_size = excluded.compressed_size,
+                       compression = excluded.compression, body = excluded.body""",
+                (self.url_hash(url), url, language, now, now, status, etag, last_modified, len(html.encode('utf-8')), len(body), self.COMPRESSION, body)
+            )
+            self.connection.commit()
+
+    def touch(self, url: str):
+        '''Marks the cached page as fresh again, e.g. after the server answered 304 Not Modified.'''
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE pages SET fetched_at = ?, last_accessed = ?, url = COALESCE(url, ?) WHERE url_hash = ?", (now, now, url, self.url_hash(url))
+            )
+            self.connection.commit()
+
+    def set_languages(self, url_languages: dict):
+        '''Records which language each cached URL belongs to. URLs that are not cached are ignored.'''
+        with self.lock:
+            self.flush_access_times()
+            self.connection.executemany(
+                "UPDATE pages SET language = ?, url = COALESCE(url, ?) WHERE url_hash = ?",
+                [(language, url, self.url_hash(url)) for url, language in url_languages.items()]
+            )
+            self.connection.commit()
+
+    def migrate_flat_directory(self):
+        '''Copies pages from the old one-file-per-URL cache into the store. The files are kept (they are versioned).
+        The old cache only recorded the URL hash, so url and language are filled in the first time the page is used.'''
+        html_files = list(self.cache_dir.glob("*.html"))
+        if not html_files:
+            return
+        print(f"Migrating {len(html_files)} cached pages from {self.cache_dir} into {self.db_path}...")
+        with self.lock:
+            for html_file in html_files:
+                html = html_file.read_text(encoding='utf-8')
+                body = self.compress(html)
+                fetched_at = html_file.stat().st_mtime
+                self.connection.execute(
+                    """INSERT OR IGNORE INTO pages (url_hash, fetched_at, last_accessed, status, size, compressed_size, compression, body)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (html_file.stem, fetched_at, fetched_at, 200, len(html.encode('utf-8')), len(body), self.COMPRESSION, body)
+                )
+            self.connection.commit()
+
+    def prune(self, ttl_seconds: float = None, max_size_bytes: int = None) -> int:
+        '''Deletes expired entries, then evicts least recently used entries until the total compressed size
+        is within max_size_bytes. Falls back to the cache's own TTL and size limit. Returns the number of entries removed.'''
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        max_size_bytes = self.max_size_bytes if max_size_bytes is None else max_size_bytes
+        removed = 0
+        with self.lock:
+            self.flush_access_times() # eviction order depends on them
+            if ttl_seconds is not None:
+                removed += self.connection.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - ttl_seconds,)).rowcount
+            if max_size_bytes is not None:
+                total_size = self.connection.execute("SELECT COALESCE(SUM(compressed_size), 0) FROM pages").fetchone()[0]
+                evicted = []
+                for url_hash, compressed_size in self.connection.execute("SELECT url_hash, compressed_size FROM pages ORDER BY last_accessed"):
+                    if total_size <= max_size_bytes:
+                        break
+                    evicted.append((url_hash,))
+                    total_size -= compressed_size
+                self.connection.executemany("DELETE FROM pages WHERE url_hash = ?", evicted)
+                removed += len(evicted)
+            self.connection.commit()
+            self.connection.execute("VACUUM")
+        return removed
+
+    def close(self):
+        '''Flushes pending access times and closes the store.'''
+        with self.lock:
+            self.flush_access_times()
+            self.connection.close()
+
+    def summarise(self) -> dict:
+        '''Returns entry count, raw and compressed sizes and the fetch-time range of the cache.'''
+        with self.lock:
+            count, size, compressed_size, oldest, newest = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(compressed_size), 0), MIN(fetched_at), MAX(fetched_at) FROM pages"
+            ).fetchone()
+        return {'entries': count, 'size': size, 'compressed_size': compressed_size, 'oldest_fetch': oldest, 'newest_fetch': newest, 'db_size': self.db_path.stat().st_size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm, inspect and prune the scraping page cache.")
+    parser.add_argument("--cache-dir", default="cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm_parser = subparsers.add_parser("warm", help="Fetch every source URL listed in a dataset into the cache.")
+    warm_parser.add_argument("--data", default="data/language_speaker_data_clean.csv", help="Parquet or CSV dataset with 'language' and 'source_urls' columns.")
+    warm_parser.add_argument("--revalidate", action="store_true", help="Revalidate cached pages with conditional GETs instead of trusting them.")
+
+    inspect_parser = subparsers.add_parser("inspect", help="Show cache totals, or the index entry of one URL.")
+    inspect_parser.add_argument("--url")
+
+    prune_parser = subparsers.add_parser("prune", help="Remove expired entries and evict least recently used ones.")
+    prune_parser.add_argument("--ttl-days", type=float)
+    prune_parser.add_argument("--max-size-mb", type=float)
+
+    args = parser.parse_args()
+    page_cache = PageCache(args.cache_dir)
+
+    if args.command == "warm":
+        from DataLoader import DataLoader
+        from Scraper import Scraper
+        data_loader = DataLoader()
+        scraper = Scraper()
+        scraper.page_cache = page_cache
+        df = data_loader.load_dataset(args.data)
+        url_languages = {}
+        for language, source_urls in zip(df['language'], data_loader.parse_list_column(df['source_urls'])):
+            if source_urls is None:
+                continue
+            for url in source_urls:
+                url_languages[url] = language
+        scraper.fetch_pages_concurrently(list(url_languages), revalidate=args.revalidate)
+        page_cache.set_languages(url_languages)
+
+    elif args.command == "inspect":
+        if args.url:
+            print(page_cache.get_entry(args.url))
+        else:
+            for key, value in page_cache.summarise().items():
+                print(f"{key}: {value}")
+
+    elif args.command == "prune":
+        ttl_seconds = args.ttl_days * 86400 if args.ttl_days is not None else None
+        max_size_bytes = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb is not None else None
+        print(f"Removed {page_cache.prune(ttl_seconds, max_size_bytes)} entries.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, asdict
+from typing import Callable
+import numpy as np
+import pandas as pd
+from DataLoader import DataLoader
+from Processor import Processor
+from Analyser import Analyser
+from ScrapingConfig import DEFAULT_SCRAPING_CONFIGS
+from Tracer import TRACER
+
+@dataclass
+class Stage:
+    name: str
+    function: Callable # called with the artifacts of the dependencies, in order; returns this stage's artifact
+    dependencies: list = field(default_factory=list) # names of the stages whose artifacts are passed in
+    input_files: list = field(default_factory=list) # files read by the stage; their contents are part of its key
+    output_files: list = field(default_factory=list) # files written by the stage; it re-runs if they are missing or edited
+    parameters: dict = field(default_factory=dict) # settings that change the result (e.g. a scraping config)
+    code_modules: list = field(default_factory=list) # names of the modules the stage calls into; their source is part of its key
+
+
+class Pipeline:
+    def __init__(self, stages: list, artifact_dir: str = "cache/pipeline", max_workers: int = 4):
+        '''Runs stages in dependency order, in parallel where they do not depend on each other.
+        Every stage has a key: a hash of its name, parameters and source code, the source of its code modules, the contents of its input files and the
+        content hashes of its dependencies' artifacts. A stage whose key matches the last run (and whose output files are
+        unchanged) is skipped and its pickled artifact is reused, loaded only if a later stage needs it. Because keys are built
+        from artifact contents, a stage that re-runs but produces the same artifact does not invalidate the stages after it.'''
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            for dependency in stage.dependencies:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dependency}.")
+        self.order = self.sort_stages()
+        self.artifact_dir = artifact_dir
+        self.manifest_path = os.path.join(artifact_dir, "manifest.json")
+        self.max_workers = max_workers
+        self.artifacts = {} # stage name -> artifact loaded or produced in this run
+        self.artifacts_lock = threading.Lock()
+        self.print_lock = threading.Lock()
+
+    def sort_stages(self) -> list:
+        '''Stage names in a topological order (each stage after its dependencies), keeping the definition order otherwise.'''
+        order = []
+        visiting = set()
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage {name} is part of a dependency cycle.")
+            visiting.add(name)
+            for dependency in self.stages[name].dependencies:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def log(self, message: str):
+        '''Prints one progress line; stages running in parallel would otherwise interleave their output.'''
+        with self.print_lock:
+            print(message)
+
+    def ancestors(self, name: str) -> set:
+        found = set()
+        pending = list(self.stages[name].dependencies)
+        while pending:
+            dependency = pending.pop()
+            if dependency not in found:
+                found.add(dependency)
+                pending.extend(self.stages[dependency].dependencies)
+        return found
+
+    def descendants(self, name: str) -> set:
+        return {other for other in self.stages if name in self.ancestors(other)}
+
+    def hash_file(self, path: str) -> str:
+        if not os.path.exists(path):
+            return None
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_source(self, function: Callable) -> str:
+        try:
+            return inspect.getsource(function)
+        except (OSError, TypeError):
+            return getattr(function, '__qualname__', repr(function))
+
+    def get_module_source(self, module_name: str) -> str:
+        '''Source of a whole module. The stage functions are thin closures, so an edit to e.g. Processor would not change
+        their own source.'''
+        return self.get_source(importlib.import_module(module_name))
+
+    def compute_key(self, stage: Stage, dependency_hashes: list) -> str:
+        key_data = {
+            'name': stage.name,
+            'parameters': stage.parameters,
+            'source': self.get_source(stage.function),
+            'code_modules': {module_name: self.get_module_source(module_name) for module_name in stage.code_modules},
+            'input_files': {path: self.hash_file(path) for path in stage.input_files},
+            'dependencies': dependency_hashes,
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def hash_artifact(self, artifact) -> str:
+        '''Content hash of an artifact. The pickled bytes are not used: they depend on which objects happen to be shared
+        (e.g. an artifact computed from freshly parsed data pickles differently from one computed from unpickled data).'''
+        if isinstance(artifact, pd.DataFrame):
+            artifact = {'dtypes': artifact.dtypes.astype(str).to_dict(), **artifact.to_dict('split')}
+        return hashlib.sha256(json.dumps(artifact, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r') as file:
+            return json.load(file)
+
+    def save_manifest(self, manifest: dict):
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.manifest_path)
+
+    def is_up_to_date(self, stage: Stage, record: dict, key: str) -> bool:
+        if record is None or record['key'] != key or not os.path.exists(record['artifact']):
+            return False
+        return all(self.hash_file(path) == record['output_files'].get(path) for path in stage.output_files)
+
+    def get_artifact(self, name: str, manifest: dict):
+        '''Returns a stage's artifact, unpickling it from the artifact directory the first time it is needed.'''
+        with self.artifacts_lock:
+            if name not in self.artifacts:
+                with open(manifest[name]['artifact'], 'rb') as file:
+                    self.artifacts[name] = pickle.load(file)
+            return self.artifacts[name]
+
+    def run_stage(self, stage: Stage, key: str, manifest: dict) -> dict:
+        '''Runs one stage, pickles its artifact and returns its new manifest record.'''
+        inputs = [self.get_artifact(dependency, manifest) for dependency in stage.dependencies]
+        start = time.perf_counter()
+        with TRACER.span(f"pipeline: {stage.name}"):
+            artifact = stage.function(*inputs)
+        elapsed = time.perf_counter() - start
+        body = pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL)
+        artifact_path = os.path.join(self.artifact_dir, f"{stage.name}-{key[:16]}.pkl")
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        with open(artifact_path, 'wb') as file:
+            file.write(body)
+        with self.artifacts_lock:
+            self.artifacts[stage.name] = artifact
+        self.log(f"[run]  {stage.name} ({elapsed:.1f}s)")
+        return {
+            'key': key,
+            'artifact': artifact_path,
+            'output_hash': self.hash_artifact(artifact),
+            'output_files': {path: self.hash_file(path) for path in stage.output_files},
+            'seconds': elapsed,
+        }
+
+    def select_stages(self, from_stage: str = None, until_stage: str = None) -> tuple:
+        '''Returns (stages to consider, stages to force) for --from/--until.
+        --until keeps only the stage and its ancestors. --from forces the stage and its descendants to re-run and
+        takes every other stage from the last build as it is, without checking whether it is stale.'''
+        for name in (from_stage, until_stage):
+            if name is not None and name not in self.stages:
+                raise ValueError(f"Unknown stage {name}. Stages: {', '.join(self.order)}")
+        selected = set(self.order)
+        if until_stage is not None:
+            selected = self.ancestors(until_stage) | {until_stage}
+        forced = set()
+        if from_stage is not None:
+            forced = ({from_stage} | self.descendants(from_stage)) & selected
+        return selected, forced
+
+    def run(self, from_stage: str = None, until_stage: str = None, force: bool = False) -> dict:
+        """
+        Runs the pipeline, skipping every stage whose key is unchanged since the last run.
+
+        Args:
+            from_stage (str, optional): Re-run this stage and everything after it, reusing the earlier stages' artifacts. Defaults to None.
+            until_stage (str, optional): Stop after this stage (only it and the stages it depends on are run). Defaults to None.
+            force (bool, optional): Re-run every selected stage. Defaults to False.
+
+        Returns:
+            dict: Stage name -> "run", "skipped" or "reused" (taken from the last build by --from).
+        """
+        selected, forced = self.select_stages(from_stage, until_stage)
+        if force:
+            forced = set(selected)
+        manifest = self.load_manifest()
+        manifest_lock = threading.Lock()
+        statuses = {}
+        pending = [name for name in self.order if name in selected]
+
+        for name in list(pending):
+            if from_stage is not None and name not in forced:
+                if name not in manifest or not os.path.exists(manifest[name]['artifact']):
+                    raise FileNotFoundError(f"--from {from_stage} needs the artifact of {name} from an earlier build; run without --from first.")
+                statuses[name] = "reused"
+                pending.remove(name)
+                self.log(f"[reuse] {name}")
+
+        def process(name: str) -> str:
+            stage = self.stages[name]
+            with manifest_lock:
+                dependency_hashes = [manifest[dependency]['output_hash'] for dependency in stage.dependencies]
+                record = manifest.get(name)
+            key = self.compute_key(stage, dependency_hashes)
+            if name not in forced and self.is_up_to_date(stage, record, key):
+                self.log(f"[skip] {name} (up to date)")
+                return "skipped"
+            new_record = self.run_stage(stage, key, manifest)
+            with manifest_lock:
+                if record is not None and record['artifact'] != new_record['artifact'] and os.path.exists(record['artifact']):
+                    os.remove(record['artifact'])
+                manifest[name] = new_record
+                self.save_manifest(manifest)
+            return "run"
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name in [name for name in pending if all(dependency in statuses for dependency in self.stages[name].dependencies)]:
+                    pending.remove(name)
+                    running[executor.submit(process, name)] = name
+                if not running:
+                    raise RuntimeError(f"Stages {', '.join(pending)} cannot run: their dependencies were not selected.")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        statuses[name] = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+        return statuses
+
+    def describe(self) -> pd.DataFrame:
+        '''The stages in run order with their dependencies and the time and key of their last run.'''
+        manifest = self.load_manifest()
+        return pd.DataFrame({
+            'Stage': self.order,
+            'Depends on': [", ".join(self.stages[name].dependencies) for name in self.order],
+            'Last run (s)': [round(manifest[name]['seconds'], 1) if name in manifest else None for name in self.order],
+            'Key': [manifest[name]['key'][:12] if name in manifest else None for name in self.order],
+        })
+
+
+def merge_scraped_sources(language_location_df: pd.DataFrame, scraped_dfs: list, preference_list: list) -> pd.DataFrame:
+    '''Combines one scrape per domain into the dataset a sequential multi-domain scrape produces: each language keeps the
+    row from the most preferred domain whose page gave a speaker number (or vitality status), or else from the most
+    preferred domain it has a link to. All scraped DataFrames are left merges of language_location_df, so their rows line up.'''
+    for scraped_df in scraped_dfs:
+        if not np.array_equal(scraped_df['language_ID'].to_numpy(), language_location_df['language_ID'].to_numpy()):
+            raise ValueError("Scraped DataFrames must keep the rows of the language location DataFrame in order.")
+    # domains whose page gave nothing rank after every domain that gave something, and languages without a source come last
+    ranks = np.vstack([
+        (scraped_df['speaker_source'].map({domain: rank for rank, domain in enumerate(preference_list)})
+         + len(preference_list) * (scraped_df['speaker_number_raw'].isna() & scraped_df['vitality_status'].isna()))
+        .fillna(2 * len(preference_list)).to_numpy(dtype=float)
+        for scraped_df in scraped_dfs
+    ])
+    row_count = len(language_location_df)
+    best_rows = ranks.argmin(axis=0) * row_count + np.arange(row_count)
+    return pd.concat(scraped_dfs, ignore_index=True).iloc[best_rows].reset_index(drop=True)
+
+def create_build_pipeline(language_geojson_path: str = "data/PNG_all_languages_coordinate_data.geojson",
+                          output_paths: list = ["data/language_speaker_data_clean.csv", "data/language_speaker_data_clean.parquet"],
+                          scraping_configs: list = DEFAULT_SCRAPING_CONFIGS,
+                          preference_list: list = ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org'],
+                          artifact_dir: str = "cache/pipeline", max_workers: int = 4, extraction_workers: int = None) -> Pipeline:
+    """
+    Builds the data pipeline behind the dashboard: Glottolog GeoJSON -> language locations -> one scrape per domain
+    (run in parallel, each domain has its own rate limiter) -> merged sources -> cleaned speaker numbers -> derived columns -> dataset files.
+
+    Args:
+        language_geojson_path (str, optional): Glottolog language GeoJSON. Defaults to "data/PNG_all_languages_coordinate_data.geojson".
+        output_paths (list, optional): Dataset files to write, in order; the Parquet file is written last so it is newer than the CSV.
+        scraping_configs (list, optional): One ScrapingConfig per domain. Defaults to DEFAULT_SCRAPING_CONFIGS.
+        preference_list (list, optional): Domains from most to least preferred.
+        artifact_dir (str, optional): Where the intermediate artifacts and the manifest are stored. Defaults to "cache/pipeline".
+        max_workers (int, optional): Number of stages run at the same time. Defaults to 4.
+        extraction_workers (int, optional): If set, the scrape stages parse their pages in one shared pool of this many processes
+            (Scraper.extract_speaker_numbers), however many stages run at once. It does not change the results, so it is not
+            part of the stage keys. Defaults to None.
+
+    Returns:
+        Pipeline: The pipeline, ready to run.
+    """
+    from Scraper import Scraper # only the build needs requests and bs4
+    data_loader = DataLoader()
+    scraper = Scraper()
+
+    def load_language_locations():
+        return Processor().create_language_location_df(data_loader.load_data_from_json(language_geojson_path))
+
+    def create_scrape(scraping_config):
+        def scrape(language_location_df):
+            scraped_df, languages_without_speaker_number, extraction_errors = scraper.orchestrate_data_scraping(language_location_df, [scraping_config], preference_list=preference_list, extraction_workers=extraction_workers)
+            print(f"{scraping_config.domain_name}: {len(languages_without_speaker_number)} languages without a speaker number.")
+            if extraction_errors:
+                print(f"{scraping_config.domain_name}: {len(extraction_errors)} pages could not be extracted, e.g. {extraction_errors[0]['url']}: {extraction_errors[0]['error']}")
+            return scraped_df
+        return scrape
+
+    def merge_sources(language_location_df, *scraped_dfs):
+        return merge_scraped_sources(language_location_df, list(scraped_dfs), preference_list)
+
+    def write_dataset(df):
+        for path in output_paths:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            data_loader.write_dataset(df, path)
+        return list(output_paths)
+
+    scrape_stages = [
+        Stage(f"scrape_{scraping_config.domain_name.split('.')[0]}", create_scrape(scraping_config), ["language_locations"],
+              parameters={'scraping_config': asdict(scraping_config), 'preference_list': preference_list}, code_modules=["Scraper", "Extractor", "Result"])
+        for scraping_config in scraping_configs
+    ]
+    stages = [
+        Stage("language_locations", load_language_locations, input_files=[language_geojson_path], code_modules=["Processor", "DataLoader"]),
+        *scrape_stages,
+        Stage("merge_sources", merge_sources, ["language_locations"] + [stage.name for stage in scrape_stages], parameters={'preference_list': preference_list},
+              code_modules=["Pipeline"]), # merge_scraped_sources lives in this module
+        Stage("clean", Processor().clean_speaker_numbers, ["merge_sources"], code_modules=["Processor"]),
+        Stage("derive", Analyser().create_derived_columns, ["clean"], code_modules=["Analyser"]),
+        Stage("write_dataset", write_dataset, ["derive"], output_files=list(output_paths), code_modules=["DataLoader"]),
+    ]
+    return Pipeline(stages, artifact_dir=artifact_dir, max_workers=max_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the language speaker dataset, re-running only the stages whose inputs changed.")
+    parser.add_argument("--geojson", default="data/PNG_all_languages_coordinate_data.geojson")
+    parser.add_argument("--output", nargs="+", default=["data/language_speaker_data_clean.csv", "data/language_speaker_data_clean.parquet"],
+                        help="Dataset files to write (.csv and/or .parquet).")
+    parser.add_argument("--artifact-dir", default="cache/pipeline")
+    parser.add_argument("--from", dest="from_stage", help="Re-run this stage and every stage after it.")
+    parser.add_argument("--until", dest="until_stage", help="Stop after this stage.")
+    parser.add_argument("--force", action="store_true", help="Re-run every selected stage.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of stages run at the same time.")
+    parser.add_argument("--extraction-workers", type=int, help="Parse the scraped pages in this many processes in total, shared by the scrape stages.")
+    parser.add_argument("--migrate-csv", action="store_true", help="Only convert the --output CSV dataset to the --output Parquet file, then exit.")
+    parser.add_argument("--list", action="store_true", help="List the stages and their last run, then exit.")
+    args = parser.parse_args()
+
+    if args.migrate_csv:
+        csv_path = next(path for path in args.output if path.endswith('.csv'))
+        parquet_path = next(path for path in args.output if path.endswith('.parquet'))
+        DataLoader().migrate_csv_to_parquet(csv_path, parquet_path, overwrite=True)
+        return
+    pipeline = create_build_pipeline(args.geojson, args.output, artifact_dir=args.artifact_dir, max_workers=args.workers, extraction_workers=args.extraction_workers)
+    if args.list:
+        print(pipeline.describe().to_string(index=False))
+        return
+    start = time.perf_counter()
+    statuses = pipeline.run(from_stage=args.from_stage, until_stage=args.until_stage, force=args.force)
+    counts = {status: list(statuses.values()).count(status) for status in ("run", "skipped", "reused")}
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f}s: {counts['run']} run, {counts['skipped']} skipped, {counts['reused']} reused.")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import re
+from Tracer import traced
 
 class Processor:
     def __init__(self):
@@ -11,6 +13,13 @@ class Processor:
         self.RE_LESS_SYMBOL = re.compile(r"<(\d+)")
         self.RE_YEAR = re.compile(r"\d{4}(?:\s*-\s*\d{4})?")
         self.RE_QUANTIFIERANDMULTIPLIER = re.compile(r"(?i)\b(?P<quantifier>a couple|a few|several|\d+)\b\s*(?P<multiplier>dozen|hundred|thousand|million)\b")
+        self.LANGUAGE_LOCATION_COLUMNS_MAPPING = {
+            'properties.language.id': 'language_ID',
+            'properties.language.name': 'language',
+            'properties.language.latitude': 'latitude',
+            'properties.language.longitude': 'longitude',
+            'properties.language.jsondata.links': 'links',
+        }
         pass
        
     def convert_json_to_df(self, json_data:dict, highest_field_name: str) -> pd.DataFrame:
@@ -22,6 +31,16 @@ class Processor:
         )
         return df
         
+    @traced()
+    def create_language_location_df(self, language_location_data: dict) -> pd.DataFrame:
+        '''Turns the Glottolog language GeoJSON into the DataFrame the scraper starts from:
+        language_ID, language, latitude, longitude and links, with Endangered Languages Project links rewritten to the current URL scheme.'''
+        df = self.convert_json_to_df(language_location_data, 'features')
+        df = self.rename_columns(df, self.LANGUAGE_LOCATION_COLUMNS_MAPPING)
+        df = self.create_new_dataframe_with_selected_columns(df, list(self.LANGUAGE_LOCATION_COLUMNS_MAPPING.values()))
+        df = self.replace_url_in_values_in_column(df, 'https://endangeredlanguages.com/lang/', 'https://www.endangeredlanguages.com/elp-language/')
+        return df
+
     def rename_columns(self, df: pd.DataFrame, columns_mapping: dict) -> pd.DataFrame:
         '''This function renames the columns of the dataframe.'''
         renamed_df = df.rename(columns=columns_mapping)
@@ -70,9 +89,9 @@ class Processor:
                 row["speaker_number_numeric"] = None
                 return row
             raw = str(raw).lower()
-            raw = self.replace_character(',', '', raw)
-            raw = self.replace_character('[\u2012\u2013\u2014]', '-', raw)
-            raw = self.replace_character('[\u00A0\u202F\u2007]', ' ', raw)
+            raw = self.replace_character(raw, ',', '')
+            raw = self.replace_character(raw, '[\u2012\u2013\u2014]', '-')
+            raw = self.replace_character(raw, '[\u00A0\u202F\u2007]', ' ')
 
             # ---------- Possibility 2: Speaker number raw contains only 1 number ----------
             if raw.isdigit():
@@ -157,6 +176,7 @@ class Processor:
                                     if "fewer than" in raw or "less than" in raw or "or less" in raw or "or fewer" in raw:
                                         row["speaker_number_min"] = 0
                                         row["speaker_number_max"] = int(q_val * self.MULTIPLIERS.get(m, 1))
+                                        row["speaker_number_numeric"] = row["speaker_number_max"] # the stated limit, which Analyser widens into the upper bound
                                         row["speaker_number_type"] = "qualitative range"
                                         return row
                                     else:
@@ -185,6 +205,128 @@ class Processor:
             # Absolute safety net
             row["speaker_number_numeric"] = None
             return row
+
+    @traced()
+    def clean_speaker_numbers(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Column-oriented version of clean_speaker_number: cleans every raw speaker number in the DataFrame at once.
+        -Normalises the raw text once, then builds one boolean mask per possibility with Series.str methods.
+        -Each mask only covers rows not claimed by an earlier possibility, in the same order as clean_speaker_number.
+        -Writes the speaker_number_* columns in bulk; cells a possibility does not set keep their current value,
+         so the output matches df.apply(self.clean_speaker_number, axis=1).
+        """
+        df = df.copy()
+        for column in ["speaker_number_numeric", "speaker_number_min", "speaker_number_max"]:
+            if column not in df.columns:
+                df[column] = None
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        for column in ["speaker_number_type", "speaker_number_year"]:
+            if column not in df.columns:
+                df[column] = None
+            df[column] = df[column].astype(object)
+
+        raw = df["speaker_number_raw"]
+        # ---------- Possibility 1: Missing data ----------
+        missing = raw.isna()
+        df.loc[missing, "speaker_number_numeric"] = None
+
+        text = raw[~missing].astype(str).str.lower()
+        text = text.str.replace(',', '', regex=False)
+        text = text.str.replace('[\u2012\u2013\u2014]', '-', regex=True)
+        text = text.str.replace('[\u00A0\u202F\u2007]', ' ', regex=True)
+        first_number = pd.to_numeric(text.str.extract(r"(\d+)", expand=False), errors="coerce")
+        second_number = text.str.extract(r"\d+\D+(\d+)", expand=False)
+        number_count = text.str.count(r"\d+")
+        remaining = pd.Series(True, index=text.index)
+
+        def claim(mask):
+            nonlocal remaining
+            mask = mask.fillna(False).astype(bool) & remaining
+            remaining = remaining & ~mask
+            return mask[mask].index
+
+        # ---------- Possibility 2: Speaker number raw contains only 1 number ----------
+        rows = claim(text.str.isdigit())
+        df.loc[rows, "speaker_number_numeric"] = pd.to_numeric(text[rows], errors="coerce")
+        # digits int() cannot parse (e.g. superscripts) hit the safety net in clean_speaker_number
+        rows = rows[df.loc[rows, "speaker_number_numeric"].notna()]
+        df.loc[rows, "speaker_number_type"] = "exact"
+        df.loc[rows, "speaker_number_min"] = df.loc[rows, "speaker_number_numeric"]
+        df.loc[rows, "speaker_number_max"] = df.loc[rows, "speaker_number_numeric"]
+
+        # ---------- Possibility 3: Cited ----------
+        rows = claim(text.str.contains("cited", regex=False))
+        with_number = rows[first_number[rows].notna()]
+        df.loc[with_number, "speaker_number_numeric"] = first_number[with_number]
+        year = text[rows].str.split("cited", n=1).str[1].str.extract(f"({self.RE_YEAR.pattern})", expand=False)
+        with_year = year[year.notna()].index
+        df.loc[with_year, "speaker_number_year"] = year[with_year]
+        df.loc[rows, "speaker_number_type"] = "exact"
+
+        # ---------- Possibility 4: Approx ----------
+        approx = text.str.extract(r"^~(\d+)", expand=False)
+        rows = claim(approx.notna())
+        df.loc[rows, "speaker_number_numeric"] = pd.to_numeric(approx[rows])
+        df.loc[rows, "speaker_number_type"] = "estimate"
+
+        # ---------- Possibility 5: Less than ----------
+        less_than = text.str.extract(r"^<(\d+)", expand=False)
+        rows = claim(less_than.notna())
+        df.loc[rows, "speaker_number_min"] = 0
+        df.loc[rows, "speaker_number_max"] = pd.to_numeric(less_than[rows])
+        df.loc[rows, "speaker_number_type"] = "range"
+
+        # ---------- Possibility 6: Fewer than ----------
+        rows = claim(text.str.startswith("fewer than"))
+        with_number = rows[first_number[rows].notna()]
+        df.loc[with_number, "speaker_number_min"] = 0
+        df.loc[with_number, "speaker_number_max"] = first_number[with_number]
+        df.loc[with_number, "speaker_number_type"] = "range"
+
+        # ---------- Possibility 7: Explicit range ----------
+        explicit_range = text.str.extract(r"^(\d+)-(\d+)$")
+        rows = claim(explicit_range[0].notna())
+        df.loc[rows, "speaker_number_min"] = pd.to_numeric(explicit_range.loc[rows, 0])
+        df.loc[rows, "speaker_number_max"] = pd.to_numeric(explicit_range.loc[rows, 1])
+        df.loc[rows, "speaker_number_type"] = "range"
+
+        # ---------- 8: Multipliers and Quantifiers ----------
+        # the first multiplier word (in MULTIPLIERS order) found in the text applies
+        multiplier_words = list(self.MULTIPLIERS)
+        multiplier = pd.Series(np.select([text.str.contains(word, regex=False) for word in multiplier_words],
+                                         [self.MULTIPLIERS[word] for word in multiplier_words], default=0), index=text.index)
+        has_multiplier = (multiplier > 0) & remaining
+
+        rows = claim(has_multiplier & (number_count == 2))
+        df.loc[rows, "speaker_number_min"] = first_number[rows] * multiplier[rows]
+        df.loc[rows, "speaker_number_max"] = pd.to_numeric(second_number[rows]) * multiplier[rows]
+        df.loc[rows, "speaker_number_type"] = "range"
+
+        quantifier_match = text.str.extract(self.RE_QUANTIFIERANDMULTIPLIER.pattern)
+        quantifier_value = quantifier_match["quantifier"].map(self.QUANTIFIERS)
+        quantifier_value = quantifier_value.fillna(pd.to_numeric(quantifier_match["quantifier"], errors="coerce")).fillna(1)
+        qualitative_value = (quantifier_value * quantifier_match["multiplier"].map(self.MULTIPLIERS)).apply(lambda value: int(value) if pd.notna(value) else value)
+        qualitative = has_multiplier & (number_count == 0) & quantifier_match["multiplier"].notna()
+        fewer = text.str.contains("fewer than|less than|or less|or fewer", regex=True)
+        rows = claim(qualitative & fewer)
+        df.loc[rows, "speaker_number_min"] = 0
+        df.loc[rows, "speaker_number_max"] = qualitative_value[rows]
+        df.loc[rows, "speaker_number_numeric"] = qualitative_value[rows] # the stated limit, which Analyser widens into the upper bound
+        df.loc[rows, "speaker_number_type"] = "qualitative range"
+        rows = claim(qualitative)
+        df.loc[rows, "speaker_number_numeric"] = qualitative_value[rows]
+        df.loc[rows, "speaker_number_type"] = "qualitative estimate"
+        # with a multiplier but no quantifier match there is nothing to set
+        claim(has_multiplier & (number_count == 0))
+
+        # ---------- 10: Wide catch for other formats  ----------
+        rows = claim(first_number.notna())
+        df.loc[rows, "speaker_number_numeric"] = first_number[rows]
+        df.loc[rows, "speaker_number_type"] = "exact"
+        with_year = rows[(number_count[rows] > 1) & (second_number[rows].str.len() >= 4)]
+        df.loc[with_year, "speaker_number_year"] = second_number[with_year]
+
+        return df
  
 
 
@@ -2,6 +2,7 @@ from dataclasses import dataclass, field
 from typing import List
 @dataclass
 class Result:
+    language_ID: str = None # glottocode, used as the merge key
     language: str = None
     speaker_number_raw: str = None # e.g., "about 1,000"
     speaker_number_numeric: int = None # cleaned
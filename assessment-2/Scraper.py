@@ -0,0 +1,498 @@
+import pandas as pd
+import math
+import multiprocessing
+import os
+import time
+import random
+import threading
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ReadTimeout, RequestException
+from Result import Result
+from ScrapingConfig import ScrapingConfig
+from TokenBucket import TokenBucket
+from PageCache import PageCache
+from Extractor import create_extractor
+from Tracer import traced
+
+class Scraper:
+    def __init__(self):
+        '''Fetches language pages (rate limited per domain, through the page cache) and extracts their speaker numbers.
+        Kept apart from DataLoader so that loading the dataset for the dashboard does not import requests or bs4.'''
+        self.HEADERS =  {
+                        "User-Agent": (
+                        "PapuanLanguagesResearchBot/1.0 "
+                        "(academic research, non-commercial; "
+                        "contact: ec25777@qmul.ac.uk)"
+                        ),
+                        "Accept-Language": "en",
+                        "Accept": "text/html"
+                        }
+        self.MAX_CONCURRENT_REQUESTS_PER_DOMAIN = 2
+        self.REQUESTS_PER_SECOND_PER_DOMAIN = 0.5
+        self.BACKOFF_BASE_SECONDS = 2
+        self.BACKOFF_MAX_SECONDS = 60
+        self.CACHE_DIR = "cache"
+        self.CACHE_TTL_SECONDS = None
+        self.CACHE_MAX_SIZE_BYTES = None
+        self.page_cache = None
+        self.page_cache_lock = threading.Lock()
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        self.EXTRACTION_BACKEND = None # None = lxml if installed, otherwise html.parser
+        self.extractor = create_extractor(self.EXTRACTION_BACKEND)
+        self.rate_limiters = {}
+        self.rate_limiters_lock = threading.Lock()
+        self.EXTRACTION_CHUNKS_PER_WORKER = 4 # several chunks per process, so a process that draws slow pages does not hold up the batch
+        # workers are started by a fork server (spawned where there is none) rather than forked, as the pipeline calls in from several threads
+        self.EXTRACTION_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.extraction_pool = None
+        self.extraction_pool_workers = None
+        self.extraction_pool_lock = threading.Lock()
+
+    def get_page_cache(self) -> PageCache:
+        '''Opens the page cache on first use, so loading data for the dashboard never touches it.'''
+        with self.page_cache_lock:
+            if self.page_cache is None:
+                self.page_cache = PageCache(self.CACHE_DIR, ttl_seconds=self.CACHE_TTL_SECONDS, max_size_bytes=self.CACHE_MAX_SIZE_BYTES)
+            return self.page_cache
+
+    def get_domain(self, url: str) -> str:
+        '''Returns the domain name of a URL, without the "www." prefix.'''
+        domain = urlparse(url).netloc.lower()
+        if domain.startswith("www."):
+            domain = domain[4:]
+        return domain
+
+    def get_rate_limiter(self, url: str) -> TokenBucket:
+        '''Returns the token bucket shared by every request to the domain of the URL.'''
+        domain = self.get_domain(url)
+        with self.rate_limiters_lock:
+            if domain not in self.rate_limiters:
+                self.rate_limiters[domain] = TokenBucket(self.REQUESTS_PER_SECOND_PER_DOMAIN)
+            return self.rate_limiters[domain]
+
+    def get_session(self, url: str) -> requests.Session:
+        '''Returns the keep-alive session for the domain of the URL, creating it on first use.
+        Its connection pool is sized to MAX_CONCURRENT_REQUESTS_PER_DOMAIN so concurrent fetches reuse connections.'''
+        domain = self.get_domain(url)
+        with self.sessions_lock:
+            if domain not in self.sessions:
+                session = requests.Session()
+                session.headers.update(self.HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.MAX_CONCURRENT_REQUESTS_PER_DOMAIN)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[domain] = session
+            return self.sessions[domain]
+
+    def calculate_backoff_delay(self, attempt: int) -> float:
+        '''Exponential backoff with full jitter: a random delay between 0 and base * 2^attempt seconds, capped at BACKOFF_MAX_SECONDS.'''
+        delay = min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2 ** attempt)
+        return random.uniform(0, delay)
+    
+    def get_page(self, url, retries: int = 3, timeout: int = 30, revalidate: bool = False) -> str:
+        '''Retrieves HTML content from a URL, using
+         caching to avoid redundant network requests.
+         If the page has been accessed before,
+         the cached version is used. If it is the first
+         time, the page is cached and then used.
+         If revalidate is True (or the cached copy has expired), a conditional
+         GET is sent with the stored ETag/Last-Modified; a 304 response only
+         refreshes the cache timestamp and the cached page is returned.'''
+        
+        page_cache = self.get_page_cache()
+        html_content = page_cache.get(url)
+        if html_content is not None and not revalidate:
+            return html_content
+
+        conditional_headers = {}
+        cache_entry = page_cache.get_entry(url)
+        if cache_entry is not None:
+            if cache_entry['etag']:
+                conditional_headers['If-None-Match'] = cache_entry['etag']
+            if cache_entry['last_modified']:
+                conditional_headers['If-Modified-Since'] = cache_entry['last_modified']
+        
+        for attempt in range(retries):
+            try:
+                self.get_rate_limiter(url).acquire()
+                response = self.get_session(url).get(url, headers = conditional_headers, timeout = timeout)
+                if response.status_code == 304 and cache_entry is not None:
+                    page_cache.touch(url)
+                    return page_cache.get(url, allow_expired=True)
+                response.raise_for_status()
+                html_content = response.text
+                page_cache.put(url, html_content, status=response.status_code, etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+                return html_content
+            except ReadTimeout:
+                print(f"Timeout occurred for {url}. Retrying {attempt + 1}/{retries}...")
+                time.sleep(self.calculate_backoff_delay(attempt))
+            except RequestException as e:
+                print(f"Request failed for {url}: {e}")
+                time.sleep(self.calculate_backoff_delay(attempt))
+        print(f"Failed to retrieve {url} after {retries} attempts.")
+        return None
+
+    @traced()
+    def fetch_pages_concurrently(self, urls: list, retries: int = 3, timeout: int = 30, revalidate: bool = False) -> dict:
+        """
+        Fetches (and caches) many pages at once using a thread pool.
+
+        Requests are grouped by domain: at most MAX_CONCURRENT_REQUESTS_PER_DOMAIN requests
+        to the same domain are in flight at a time, and every request takes a token from the
+        domain's rate limiter, so each website sees the same polite request rate as a serial scrape.
+
+        Args:
+            urls (list): URLs to fetch. Duplicates are fetched once.
+            retries (int, optional): Number of attempts per URL. Defaults to 3.
+            timeout (int, optional): Request timeout in seconds. Defaults to 30.
+            revalidate (bool, optional): If True, cached pages are revalidated with conditional GETs. Defaults to False.
+
+        Returns:
+            dict: Mapping of URL to HTML content (None for pages that could not be retrieved).
+        """
+        urls = list(dict.fromkeys(urls))
+        domain_semaphores = {}
+        for url in urls:
+            domain = self.get_domain(url)
+            if domain not in domain_semaphores:
+                domain_semaphores[domain] = threading.Semaphore(self.MAX_CONCURRENT_REQUESTS_PER_DOMAIN)
+
+        def fetch(url):
+            with domain_semaphores[self.get_domain(url)]:
+                return self.get_page(url, retries=retries, timeout=timeout, revalidate=revalidate)
+
+        pages = {}
+        failures = []
+        start = time.perf_counter()
+        max_workers = max(1, len(domain_semaphores) * self.MAX_CONCURRENT_REQUESTS_PER_DOMAIN)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    pages[url] = future.result()
+                except Exception as e:
+                    print(f"Error fetching {url}: {e}")
+                    pages[url] = None
+                if pages[url] is None:
+                    failures.append(url)
+        elapsed = time.perf_counter() - start
+
+        pages_per_second = len(urls) / elapsed if elapsed > 0 else float(len(urls))
+        print(f"Fetched {len(urls) - len(failures)}/{len(urls)} pages in {elapsed:.1f}s ({pages_per_second:.2f} pages/s), {len(failures)} failures.")
+        for url in failures:
+            print(f"  Failed: {url}")
+        return pages
+
+    def get_extraction_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        '''Returns the extraction process pool, starting it with max_workers processes on first use.
+        The pool is shared by every call (e.g. the pipeline's scrape stages, which run in parallel threads), so the
+        number of processes stays at max_workers however many calls run at once; close_extraction_pool resizes it.
+        The workers are not forked, so they import the calling script: it needs an `if __name__ == "__main__":` guard.'''
+        with self.extraction_pool_lock:
+            if self.extraction_pool is None:
+                page_cache = self.get_page_cache()
+                self.extraction_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(self.EXTRACTION_START_METHOD),
+                                                           initializer=initialise_extraction_worker, initargs=(str(page_cache.cache_dir), self.extractor.BACKEND))
+                self.extraction_pool_workers = max_workers
+            return self.extraction_pool
+
+    def close_extraction_pool(self):
+        '''Shuts the extraction processes down; the next extraction starts a new pool.'''
+        with self.extraction_pool_lock:
+            if self.extraction_pool is not None:
+                self.extraction_pool.shutdown()
+                self.extraction_pool = None
+
+    @traced()
+    def extract_speaker_numbers(self, jobs: list, max_workers: int = None, chunk_size: int = None, parse_times: dict = None) -> tuple:
+        """
+        Extracts the raw speaker number from many cached pages at once, parsing them in a pool of processes
+        (parsing is CPU-bound, so threads would share one core).
+
+        Pages missing from the cache (or expired) are fetched first with fetch_pages_concurrently. The jobs are then
+        split into chunks; each worker process opens the page cache read-only, reads its pages and runs the extractor on them.
+        The pool is kept for later calls (see get_extraction_pool).
+
+        Args:
+            jobs (list): (url, ScrapingConfig) tuples.
+            max_workers (int, optional): Number of processes, if the pool is not running yet. Defaults to the number of CPUs.
+            chunk_size (int, optional): Jobs sent to a process at a time. Defaults to an even split into
+                EXTRACTION_CHUNKS_PER_WORKER chunks per process.
+            parse_times (dict, optional): The caller's domain -> parse times dict; the workers' times for these jobs are added to it. Defaults to None.
+
+        Returns:
+            tuple: (list of extracted values in the order of the jobs (None where nothing was found or extraction failed),
+                list of {'url', 'domain', 'error'} dicts for the jobs that failed, in job order)
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return [], []
+        page_cache = self.get_page_cache()
+        stale_urls = []
+        for url, _ in jobs:
+            entry = page_cache.get_entry(url)
+            if entry is None or page_cache.is_expired(entry['fetched_at']):
+                stale_urls.append(url)
+        if stale_urls:
+            self.fetch_pages_concurrently(stale_urls)
+
+        executor = self.get_extraction_pool(max_workers or os.cpu_count() or 1)
+        max_workers = self.extraction_pool_workers
+        chunk_size = chunk_size or math.ceil(len(jobs) / (max_workers * self.EXTRACTION_CHUNKS_PER_WORKER))
+        indexed_jobs = [(index, url, self.get_domain(url), scraping_config) for index, (url, scraping_config) in enumerate(jobs)]
+        chunks = [indexed_jobs[start:start + chunk_size] for start in range(0, len(indexed_jobs), chunk_size)]
+
+        values = [None] * len(jobs)
+        errors = {}
+        start = time.perf_counter()
+        futures = {executor.submit(extract_chunk, chunk): chunk for chunk in chunks}
+        pool_broken = False
+        for future in as_completed(futures):
+            try:
+                chunk_results = future.result()
+            except Exception as e: # the worker process itself failed, e.g. it was killed
+                pool_broken = pool_broken or isinstance(e, BrokenProcessPool)
+                chunk_results = [(index, None, f"{type(e).__name__}: {e}", None) for index, _, _, _ in futures[future]]
+            for index, value, error, parse_time in chunk_results:
+                values[index] = value
+                domain = indexed_jobs[index][2]
+                if error is not None:
+                    errors[index] = {'url': jobs[index][0], 'domain': domain, 'error': error}
+                if parse_time is not None and parse_times is not None:
+                    parse_times.setdefault(domain, []).append(parse_time)
+        elapsed = time.perf_counter() - start
+        if pool_broken:
+            self.close_extraction_pool() # a broken pool refuses new work, so the next call starts a fresh one
+
+        pages_per_second = len(jobs) / elapsed if elapsed > 0 else float(len(jobs))
+        print(f"Extracted {len(jobs) - len(errors)}/{len(jobs)} pages in {elapsed:.1f}s with {max_workers} processes ({pages_per_second:.1f} pages/s), {len(errors)} errors.")
+        return values, [errors[index] for index in sorted(errors)]
+
+    def extract_pages(self, jobs: list, max_workers: int = None, chunk_size: int = None) -> tuple:
+        '''Batch version of scrape_data_in_class_field_from_website: runs extract_speaker_numbers and returns
+        (one Result per job, in job order, with the scraped and source fields set; errors). language_ID and language are left to the caller.'''
+        values, errors = self.extract_speaker_numbers(jobs, max_workers=max_workers, chunk_size=chunk_size)
+        results = [Result(**self.create_job_result(url, scraping_config, value)) for (url, scraping_config), value in zip(jobs, values)]
+        return results, errors
+          
+    def orchestrate_data_scraping_per_domain_name(self, df: pd.DataFrame, domain_name: str, speaker_number_html_field: str, source_category: str, source_type: str, access_route: str, attribute1: str = None, attribute2: str = None, string_expression: str = None, method_called_after_label_identified: str= None, preference_list: list = ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org'], concurrent: bool = False) -> pd.DataFrame:
+        """
+        Orchestrates the scraping of speaker number data for a specific domain name from a DataFrame of languages.
+        Kept for scraping a single domain; it is a thin wrapper around orchestrate_data_scraping.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing language data, including 'language_ID', 'language' and 'links' columns.
+            domain_name (str): The domain name to prioritize for scraping.
+            speaker_number_html_field (str): HTML class field to locate speaker number data.
+            source_category (str): Category of the data source.
+            source_type (str): Type of the data source.
+            access_route (str): Route used to access the data source.
+            attribute1 (str, optional): Primary HTML tag for filtering. Defaults to None.
+            attribute2 (str, optional): Secondary HTML attribute for filtering. Defaults to None.
+            string_expression (str, optional): String expression to refine the search. Defaults to None.
+            method_called_after_label_identified (str, optional): Method to call on the identified label. Defaults to None.
+            preference_list (list, optional): Ordered list of preferred domains for scraping. Defaults to ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org'].
+            concurrent (bool, optional): If True, all pages are fetched up front with fetch_pages_concurrently. Defaults to False.
+        """
+        scraping_config = ScrapingConfig(domain_name, speaker_number_html_field, source_category, source_type, access_route, attribute1=attribute1, attribute2=attribute2, string_expression=string_expression, method_called_after_label_identified=method_called_after_label_identified)
+        return self.orchestrate_data_scraping(df, [scraping_config], preference_list=preference_list, concurrent=concurrent)
+
+    def plan_scraping_jobs(self, links: list, scraping_configs: list, preference_list: list, current_source: str = None) -> tuple:
+        '''Chooses the links to scrape for one language, most preferred first: the links from the configured domains,
+        ordered by the domain's rank in the preference list and then by their order in links. A link only qualifies if its
+        domain ranks higher than current_source (or no source is set). The first link is scraped and the others are
+        fallbacks, tried in order while a page yields no speaker number.
+        Returns a list of (url, ScrapingConfig) tuples, empty if no link qualifies.'''
+        ranked_jobs = []
+        for link in links:
+            url = link['url']
+            for scraping_config in scraping_configs:
+                domain_name = scraping_config.domain_name
+                if domain_name in url and (current_source is None or preference_list.index(current_source) > preference_list.index(domain_name)):
+                    ranked_jobs.append((preference_list.index(domain_name), url, scraping_config))
+        ranked_jobs.sort(key=lambda ranked_job: ranked_job[0])
+        return [(url, scraping_config) for _, url, scraping_config in ranked_jobs]
+
+    @traced()
+    def orchestrate_data_scraping(self, df: pd.DataFrame, scraping_configs: list, preference_list: list = ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org'], concurrent: bool = False, extraction_workers: int = None) -> tuple:
+        """
+        Orchestrates the scraping of speaker number data for several domains in a single pass over the DataFrame.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing language data, including 'language_ID', 'language' and 'links' columns.
+                If it already holds results from an earlier run (a 'speaker_source' column), those results are kept
+                unless a more preferred domain is configured.
+            scraping_configs (list): ScrapingConfig objects, one per domain to scrape.
+            preference_list (list, optional): Ordered list of preferred domains for scraping. Defaults to ['endangeredlanguages.com', 'apics-online.info', 'wikipedia.org'].
+            concurrent (bool, optional): If True, all pages are fetched up front with fetch_pages_concurrently. Defaults to False.
+            extraction_workers (int, optional): If set, the pages are parsed by extract_pages in this many processes. Defaults to None (one page at a time).
+
+        Processes:
+            - Walks the rows once, ranking the links of each language (plan_scraping_jobs).
+            - If concurrent is set, prefetches the most preferred page of every language into the cache.
+            - Scrapes the most preferred page of each language, falling back to the next link while a page yields no
+              speaker number, and builds one Result per language. If no page yields one, the most preferred page is
+              recorded, unless the language already has a result from an earlier run.
+              With extraction_workers, each round of fallbacks is one batch, and errors are returned instead of being
+              printed per page.
+            Nothing about the call is kept on the Scraper, so one instance can scrape several domains at the same time
+            (as the pipeline's scrape stages do).
+            - Merges all results into the DataFrame with a single left merge on 'language_ID'.
+
+        Returns:
+            tuple: (merged DataFrame, set of languages without a speaker number,
+                list of {'url', 'domain', 'error'} dicts for the pages that could not be extracted (only with extraction_workers))
+        """
+        result_fields = [name for name in Result.__dataclass_fields__ if name not in ('language_ID', 'language')]
+        has_previous_results = 'speaker_source' in df.columns
+        planned_rows = []
+
+        for row in df.to_dict('records'):
+            result = asdict(Result())
+            result["language_ID"] = row["language_ID"]
+            result["language"] = row["language"]
+            if has_previous_results and pd.notna(row["speaker_source"]):
+                for name in result_fields:
+                    if name in row:
+                        result[name] = row[name]
+            jobs = self.plan_scraping_jobs(row["links"], scraping_configs, preference_list, result["speaker_source"])
+            planned_rows.append((result, jobs))
+
+        if concurrent:
+            self.fetch_pages_concurrently([jobs[0][0] for _, jobs in planned_rows if jobs])
+
+        extracted_values = {} # (row index, job index) -> raw speaker number, for the pages parsed in batches
+        extraction_errors = []
+        parse_times = {} # domain -> parse times of this call only
+        if extraction_workers:
+            pending = [(row_index, 0) for row_index, (_, jobs) in enumerate(planned_rows) if jobs]
+            while pending:
+                batch = [planned_rows[row_index][1][job_index] for row_index, job_index in pending]
+                values, errors = self.extract_speaker_numbers(batch, max_workers=extraction_workers, parse_times=parse_times)
+                extraction_errors.extend(errors)
+                for (row_index, job_index), value in zip(pending, values):
+                    extracted_values[(row_index, job_index)] = value
+                pending = [(row_index, job_index + 1) for (row_index, job_index), value in zip(pending, values)
+                           if not value and job_index + 1 < len(planned_rows[row_index][1])]
+
+        languages_without_speaker_number = set()
+        results_list = []
+        scraped_languages = {}
+        for row_index, (result, jobs) in enumerate(planned_rows):
+            chosen_job_result = None
+            for job_index, (url, scraping_config) in enumerate(jobs):
+                if extraction_workers:
+                    speaker_number_raw = extracted_values[(row_index, job_index)]
+                else:
+                    speaker_number_raw = self.scrape_data_in_class_field_from_website(url, html_class_field = scraping_config.speaker_number_html_field, string_expression= scraping_config.string_expression, attribute1 = scraping_config.attribute1, attribute2 = scraping_config.attribute2, method_called_after_label_identified= scraping_config.method_called_after_label_identified, parse_times=parse_times)
+                scraped_languages[url] = result["language"]
+                job_result = self.create_job_result(url, scraping_config, speaker_number_raw)
+                if speaker_number_raw:
+                    chosen_job_result = job_result
+                    break
+                if chosen_job_result is None and pd.isna(result["speaker_source"]):
+                    chosen_job_result = job_result # no page may give a number: the most preferred one is recorded
+            if chosen_job_result is not None:
+                result.update(chosen_job_result)
+
+            if (not result["speaker_number_raw"] or pd.isna(result["speaker_number_raw"])) and pd.isna(result["vitality_status"]):
+                languages_without_speaker_number.add(result["language"])
+            results_list.append(result)
+
+        self.extractor.print_parse_time_summary(parse_times)
+        self.get_page_cache().set_languages(scraped_languages)
+        speaker_data_df = pd.DataFrame(results_list, columns=list(Result.__dataclass_fields__)).drop(columns='language')
+        df = df.drop(columns=[column for column in result_fields if column in df.columns])
+        final_df = self.left_merge_data_frames(df, speaker_data_df, on='language_ID')
+        return final_df, languages_without_speaker_number, extraction_errors
+      
+    def create_job_result(self, url: str, scraping_config: ScrapingConfig, speaker_number_raw: str) -> dict:
+        '''The Result fields set by scraping one page: the raw speaker number (or the vitality status it names) and the source columns.'''
+        result = {
+            "speaker_number_raw": speaker_number_raw,
+            "source_urls": [url],
+            "speaker_source": scraping_config.domain_name,
+            "source_category": scraping_config.source_category,
+            "source_type": scraping_config.source_type,
+            "access_route": scraping_config.access_route,
+        }
+        if speaker_number_raw == "Extinct":
+            result = self.fill_columns_based_on_language_vitality("extinct", result)
+        elif speaker_number_raw == "Dormant":
+            result = self.fill_columns_based_on_language_vitality("dormant", result)
+        return result
+
+    def fill_columns_based_on_language_vitality(self, vitality_label:str, result_dict: dict) -> dict:
+        '''Fills the result dictionary with specific values based on the language vitality status.'''
+        result_dict["vitality_status"] = vitality_label.lower()
+        result_dict["speaker_number_raw"] = None
+        result_dict["speaker_number_numeric"] = None
+        return result_dict
+    
+    def left_merge_data_frames(self, df1: pd.DataFrame, df2: pd.DataFrame, on: str = None) -> pd.DataFrame:
+        merged_df = pd.merge(df1, df2, how='left', on=on)
+        return merged_df #write to file
+        
+    def scrape_data_in_class_field_from_website(self, url: str, html_class_field: str = None, string_expression: str= None, attribute1: str = "div", attribute2: str = None, method_called_after_label_identified: str= None, parse_times: dict = None) -> dict:
+        """
+        Scrapes data from a webpage based on specified HTML attributes and class fields.
+
+        Args:
+            url (str): The URL of the webpage to scrape.
+            html_class_field (str, optional): The HTML class to locate the target element. Defaults to None.
+            string_expression (str, optional): A string expression to refine the search. Defaults to None.
+            attribute1 (str, optional): The primary HTML tag to search for. Defaults to "div".
+            attribute2 (str, optional): A secondary HTML attribute for further filtering. Defaults to None.
+            method_called_after_label_identified (str, optional): A method to call on the identified label (e.g., "find_next_sibling"). Defaults to None.
+            parse_times (dict, optional): Domain -> parse times dict the page's parse time is added to (see Extractor.extract). Defaults to None.
+
+        Returns:
+            dict: A dictionary containing the scraped data or a status string ("Extinct" or "Dormant") if specific keywords are found.
+
+        The page is parsed by self.extractor (see Extractor.create_extractor); set EXTRACTION_BACKEND to choose the parser.
+        """
+
+        try:
+            html = self.get_page(url)
+            if html is None:
+                return None
+            return self.extractor.extract(html, domain=self.get_domain(url), html_class_field=html_class_field, string_expression=string_expression, attribute1=attribute1, attribute2=attribute2, method_called_after_label_identified=method_called_after_label_identified, parse_times=parse_times)
+        
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+
+
+# Set in each extraction worker process by initialise_extraction_worker.
+WORKER_PAGE_CACHE = None
+WORKER_EXTRACTOR = None
+
+def initialise_extraction_worker(cache_dir: str, backend: str):
+    '''Opens the page cache read-only and creates the extractor once per worker process.'''
+    global WORKER_PAGE_CACHE, WORKER_EXTRACTOR
+    WORKER_PAGE_CACHE = PageCache(cache_dir, read_only=True)
+    WORKER_EXTRACTOR = create_extractor(backend)
+
+def extract_chunk(chunk: list) -> list:
+    '''Runs in a worker process: extracts each (index, url, domain, ScrapingConfig) job of the chunk.
+    Returns (index, value, error message or None, parse time in seconds or None) tuples; errors are returned, not raised,
+    so one bad page does not lose the rest of the chunk.'''
+    results = []
+    for index, url, domain, scraping_config in chunk:
+        try:
+            html = WORKER_PAGE_CACHE.get(url, allow_expired=True)
+            if html is None:
+                raise LookupError(f"{url} is not in the page cache")
+            start = time.perf_counter()
+            value = WORKER_EXTRACTOR.extract(html, domain=domain, html_class_field=scraping_config.speaker_number_html_field, string_expression=scraping_config.string_expression, attribute1=scraping_config.attribute1, attribute2=scraping_config.attribute2, method_called_after_label_identified=scraping_config.method_called_after_label_identified)
+            results.append((index, value, None, time.perf_counter() - start))
+        except Exception as e:
+            results.append((index, None, f"{type(e).__name__}: {e}", None))
+    return results
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+@dataclass
+class ScrapingConfig:
+    domain_name: str # e.g., "wikipedia.org"
+    speaker_number_html_field: str # html class that locates the speaker number (or its label)
+    source_category: str # primary, secondary, tertiary
+    source_type: str # expert-curated, community-curated
+    access_route: str # direct, indirect
+    attribute1: str = None # html tag carrying the class, e.g. "th"
+    attribute2: str = None # html tag of the value when the class locates a label, e.g. "td"
+    string_expression: str = None # text of the label, e.g. "Native speakers"
+    method_called_after_label_identified: str = None # e.g. "find_next_sibling"
+
+
+DEFAULT_SCRAPING_CONFIGS = [
+    ScrapingConfig('endangeredlanguages.com', 'speaker-number-value', 'secondary', 'expert-curated', 'direct'),
+    ScrapingConfig('wikipedia.org', 'infobox-label', 'tertiary', 'community-curated', 'direct',
+                   attribute1='th', attribute2='td', string_expression='Native speakers', method_called_after_label_identified='find_next_sibling'),
+    ScrapingConfig('apics-online.info', 'key', 'secondary', 'expert-curated', 'direct',
+                   attribute1='td', string_expression='Number of speakers', method_called_after_label_identified='find_next_sibling'),
+]
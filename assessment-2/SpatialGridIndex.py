@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+class SpatialGridIndex:
+    def __init__(self, latitudes, longitudes, cell_size: float = 0.25):
+        '''Uniform latitude/longitude grid over a set of points, for bounding-box queries and grid-cell aggregation.
+        -cell_size: side of a grid cell in degrees.
+        Points are referred to by their position in the arrays passed in (i.e. iloc positions of the DataFrame they came from);
+        points without coordinates are never returned.'''
+        self.cell_size = cell_size
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        positions = np.flatnonzero(~np.isnan(self.latitudes) & ~np.isnan(self.longitudes))
+        rows = np.floor(self.latitudes[positions] / cell_size).astype(np.int64)
+        columns = np.floor(self.longitudes[positions] / cell_size).astype(np.int64)
+
+        # points sorted by cell, with each occupied cell pointing at its slice of the sorted positions
+        order = np.lexsort((columns, rows))
+        self.sorted_positions = positions[order]
+        cells, starts = np.unique(np.column_stack((rows[order], columns[order])), axis=0, return_index=True)
+        self.cell_rows = cells[:, 0] if len(cells) else np.empty(0, dtype=np.int64)
+        self.cell_columns = cells[:, 1] if len(cells) else np.empty(0, dtype=np.int64)
+        self.cell_starts = starts
+        self.cell_ends = np.append(starts[1:], len(self.sorted_positions))
+
+    def query(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """
+        Returns the positions of the points inside a bounding box, in ascending order.
+
+        Args:
+            south (float): Minimum latitude.
+            west (float): Minimum longitude.
+            north (float): Maximum latitude.
+            east (float): Maximum longitude.
+
+        Returns:
+            np.ndarray: Positions of the points with south <= latitude <= north and west <= longitude <= east.
+        """
+        candidate_cells = np.flatnonzero(
+            (self.cell_rows >= np.floor(south / self.cell_size)) & (self.cell_rows <= np.floor(north / self.cell_size))
+            & (self.cell_columns >= np.floor(west / self.cell_size)) & (self.cell_columns <= np.floor(east / self.cell_size))
+        )
+        if len(candidate_cells) == 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.concatenate([self.sorted_positions[self.cell_starts[cell]:self.cell_ends[cell]] for cell in candidate_cells])
+        # cells on the edge of the box are only partly inside it
+        latitudes = self.latitudes[candidates]
+        longitudes = self.longitudes[candidates]
+        inside = (latitudes >= south) & (latitudes <= north) & (longitudes >= west) & (longitudes <= east)
+        return np.sort(candidates[inside])
+
+    def aggregate(self, positions, cell_size: float) -> pd.DataFrame:
+        '''Groups the given points into cells of cell_size degrees.
+        -OUTPUT: DataFrame with one row per occupied cell: 'latitude' and 'longitude' (mean of its points) and 'count'.'''
+        positions = np.asarray(positions, dtype=np.int64)
+        points = pd.DataFrame({'latitude': self.latitudes[positions], 'longitude': self.longitudes[positions]}).dropna()
+        cells = [np.floor(points['latitude'] / cell_size), np.floor(points['longitude'] / cell_size)]
+        return points.groupby(cells, sort=False).agg(
+            latitude=('latitude', 'mean'),
+            longitude=('longitude', 'mean'),
+            count=('latitude', 'size'),
+        ).reset_index(drop=True)
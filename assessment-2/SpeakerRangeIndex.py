@@ -0,0 +1,91 @@
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+class SpeakerRangeIndex:
+    def __init__(self, minimums, maximums, slider_step: float = 0.01, max_memoized_queries: int = 256):
+        '''Interval index over the speaker number range (speaker_number_min to speaker_number_max) of each language.
+        -Keeps the lower bounds and the upper bounds in two sorted arrays, so counting the languages whose range overlaps
+         a query range takes two binary searches.
+        -slider_step: resolution of the log-scale slider; query results are memoized per slider position at this resolution.
+        -max_memoized_queries: the least recently used results are dropped beyond this many, as the index is shared by every session.
+        Languages are referred to by their position in the arrays passed in; languages with a missing bound never match,
+        like the np.where comparison this replaces.'''
+        minimums = np.asarray(minimums, dtype=float)
+        maximums = np.asarray(maximums, dtype=float)
+        self.slider_step = slider_step
+        positions = np.flatnonzero(~np.isnan(minimums) & ~np.isnan(maximums))
+        self.size = len(minimums)
+
+        order = np.argsort(minimums[positions], kind='stable')
+        self.positions_by_minimum = positions[order]
+        self.sorted_minimums = minimums[self.positions_by_minimum]
+        self.maximums_by_minimum = maximums[self.positions_by_minimum]
+        self.sorted_maximums = np.sort(maximums[positions])
+        self.max_value = self.sorted_maximums[-1] if len(positions) else 0.0
+        self.MAX_MEMOIZED_QUERIES = max_memoized_queries
+        self.memoized_queries = OrderedDict()
+        self.memoized_queries_lock = threading.Lock()
+
+    def count(self, lower: float, upper: float, include_upper: bool = True) -> int:
+        '''Number of languages whose range overlaps [lower, upper], or [lower, upper) without include_upper, in O(log n).
+        Every language with maximum < lower also starts within the upper end, so it can simply be subtracted.'''
+        if lower > upper or (lower == upper and not include_upper):
+            return 0
+        starting_within_upper = np.searchsorted(self.sorted_minimums, upper, side='right' if include_upper else 'left')
+        ending_below_lower = np.searchsorted(self.sorted_maximums, lower, side='left')
+        return int(starting_within_upper - ending_below_lower)
+
+    def query(self, lower: float, upper: float) -> np.ndarray:
+        """
+        Returns the positions of the languages whose range overlaps [lower, upper], i.e. maximum >= lower and minimum <= upper.
+        The languages starting at or below upper are found by binary search; only those are checked against lower.
+        Results are memoized per (lower, upper), keeping the MAX_MEMOIZED_QUERIES most recently used, and returned read-only.
+
+        Args:
+            lower (float): Lower end of the user's range.
+            upper (float): Upper end of the user's range.
+
+        Returns:
+            np.ndarray: Matching positions in ascending order.
+        """
+        key = (lower, upper)
+        with self.memoized_queries_lock:
+            if key in self.memoized_queries:
+                self.memoized_queries.move_to_end(key)
+                return self.memoized_queries[key]
+        end = np.searchsorted(self.sorted_minimums, upper, side='right')
+        candidates = self.positions_by_minimum[:end]
+        positions = np.sort(candidates[self.maximums_by_minimum[:end] >= lower])
+        positions.flags.writeable = False
+        with self.memoized_queries_lock:
+            self.memoized_queries[key] = positions
+            while len(self.memoized_queries) > self.MAX_MEMOIZED_QUERIES:
+                self.memoized_queries.popitem(last=False)
+        return positions
+
+    def query_slider(self, slider_min: float, slider_max: float, min_power_of_ten: float) -> np.ndarray:
+        '''Query for a log-scale slider position (powers of ten); the bottom of the slider means 0 speakers.
+        The slider values are snapped to slider_step so every position of the slider maps to one memoized result.'''
+        slider_min = round(round(slider_min / self.slider_step) * self.slider_step, 10)
+        slider_max = round(round(slider_max / self.slider_step) * self.slider_step, 10)
+        lower = 0 if slider_min <= min_power_of_ten else 10 ** slider_min
+        return self.query(lower, 10 ** slider_max)
+
+    def max_power_of_ten(self) -> float:
+        '''Smallest whole power of ten at or above the largest speaker number.'''
+        return float(math.ceil(math.log10(self.max_value))) if self.max_value > 0 else 0.0
+
+    def bucket_counts(self, min_power_of_ten: float = -1.0) -> pd.DataFrame:
+        '''Number of languages overlapping each decade of the slider (0-1, 1-10, 10-100, ...).
+        The decades are half-open, [lower, upper), except the last, so a language of exactly 100 speakers is counted once.
+        -OUTPUT: DataFrame with columns 'Range' and 'Languages'.'''
+        edges = [0] + [10 ** power for power in range(int(min_power_of_ten) + 1, int(self.max_power_of_ten()) + 1)]
+        ranges = []
+        counts = []
+        for index, (lower, upper) in enumerate(zip(edges[:-1], edges[1:])):
+            ranges.append(f"{lower:,} to {upper:,}")
+            counts.append(self.count(lower, upper, include_upper=index == len(edges) - 2))
+        return pd.DataFrame({'Range': ranges, 'Languages': counts})
@@ -0,0 +1,30 @@
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1):
+        '''Token-bucket rate limiter.
+        -rate: tokens added per second (i.e. the sustained request rate).
+        -capacity: maximum number of tokens that can be saved up for a burst.'''
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        '''Adds the tokens earned since the last refill, up to the bucket capacity.'''
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        '''Blocks until a token is available, then consumes it.'''
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,154 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import nullcontext
+import pandas as pd
+
+class Span:
+    '''One timed section of code. Set rows inside the with-block to record how many rows it handled.'''
+    def __init__(self, tracer, name: str, rows: int = None):
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.tracer.enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.exit(self, failed=exc_type is not None)
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled: bool = None, export_path: str = None, max_runs: int = 32):
+        '''Records spans (wall time, peak traced memory and row counts) for the pipeline stages.
+        -enabled: defaults to the PNG_DASHBOARD_TRACE environment variable ("1" or "true").
+        -export_path: JSON lines file that export() appends the spans to; defaults to PNG_DASHBOARD_TRACE_FILE or perf_spans.jsonl.
+        -max_runs: spans are kept for this many runs; older ones are dropped.
+        Spans are kept per run. The run is per thread (each Streamlit session reruns the script in its own thread), so
+        concurrent sessions do not clear or mix each other's spans; spans recorded outside a run (e.g. by the pipeline's
+        stage threads) go to the run None.
+        Peak memory comes from tracemalloc, whose peak is process-wide: it is only meaningful when one session (or one
+        pipeline stage) runs at a time, as anything else running in the process is counted too.
+        When disabled, span() returns a shared no-op context manager and traced() returns the function unchanged,
+        so instrumented code runs exactly as before.'''
+        if enabled is None:
+            enabled = os.environ.get("PNG_DASHBOARD_TRACE", "").lower() in ("1", "true")
+        self.enabled = enabled
+        self.export_path = export_path or os.environ.get("PNG_DASHBOARD_TRACE_FILE", "perf_spans.jsonl")
+        self.MAX_RUNS = max_runs
+        self.runs = OrderedDict() # run id -> spans recorded in that run
+        self.lock = threading.Lock()
+        self.local = threading.local() # each thread keeps its own run id and stack of open spans
+        self.NO_OP_SPAN = nullcontext(Span(None, None))
+
+    @property
+    def run_id(self) -> str:
+        '''Id of the run started by this thread, or None.'''
+        return getattr(self.local, "run_id", None)
+
+    def start_run(self) -> str:
+        '''Starts a new run for the calling thread (e.g. one Streamlit rerun of one session): the panel and export()
+        then only show the spans recorded by this thread from here on. Returns the run id.'''
+        if not self.enabled:
+            return None
+        run_id = time.strftime("%Y%m%dT%H%M%S") + f"-{threading.get_ident() % 10000:04d}-{time.perf_counter_ns() % 1000000:06d}"
+        self.local.run_id = run_id
+        with self.lock:
+            self.runs[run_id] = []
+            while len(self.runs) > self.MAX_RUNS:
+                self.runs.popitem(last=False)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return run_id
+
+    def span(self, name: str, rows: int = None):
+        if not self.enabled:
+            return self.NO_OP_SPAN
+        return Span(self, name, rows)
+
+    def enter(self, span: Span):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        stack = self.local.__dict__.setdefault("stack", [])
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        if stack:
+            # reset_peak below forgets the parent's peak so far, so it is carried on the parent instead
+            stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak_memory)
+        tracemalloc.reset_peak() # process-wide: spans open in other threads lose their peak so far too
+        stack.append({"span": span, "start": time.perf_counter(), "started_at": time.time(), "start_memory": current_memory, "child_peak": 0})
+
+    def exit(self, span: Span, failed: bool = False):
+        wall_time = time.perf_counter() - self.local.stack[-1]["start"]
+        entry = self.local.stack.pop()
+        peak_memory = max(tracemalloc.get_traced_memory()[1], entry["child_peak"])
+        if self.local.stack:
+            self.local.stack[-1]["child_peak"] = max(self.local.stack[-1]["child_peak"], peak_memory)
+        record = {
+            "run_id": self.run_id,
+            "name": span.name,
+            "parent": self.local.stack[-1]["span"].name if self.local.stack else None,
+            "depth": len(self.local.stack),
+            "thread": threading.current_thread().name,
+            "started_at": entry["started_at"],
+            "wall_s": wall_time,
+            "peak_memory_bytes": max(0, peak_memory - entry["start_memory"]),
+            "rows": span.rows,
+            "failed": failed,
+        }
+        with self.lock:
+            self.runs.setdefault(self.run_id, []).append(record)
+
+    def traced(self, name: str = None):
+        '''Decorator version of span(). The row count is taken from the return value if it is a DataFrame,
+        otherwise from the first DataFrame argument.'''
+        def decorator(function):
+            if not self.enabled:
+                return function
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name) as span:
+                    result = function(*args, **kwargs)
+                    frames = [result] + list(args) + list(kwargs.values())
+                    span.rows = next((len(frame) for frame in frames if isinstance(frame, pd.DataFrame)), None)
+                    return result
+            return wrapper
+        return decorator
+
+    def get_spans(self, run_id: str = None) -> list:
+        '''Spans of a run (by default the calling thread's run), in the order they were recorded.'''
+        with self.lock:
+            return list(self.runs.get(run_id or self.run_id, []))
+
+    def summarise(self, run_id: str = None) -> pd.DataFrame:
+        '''Spans of a run (by default the calling thread's run) in the order they started, with the name indented by nesting depth.'''
+        spans = sorted(self.get_spans(run_id), key=lambda record: record["started_at"])
+        return pd.DataFrame({
+            "Stage": [" " * record["depth"] + record["name"] for record in spans],
+            "Time (ms)": [round(record["wall_s"] * 1000, 1) for record in spans],
+            "Peak memory (MB)": [round(record["peak_memory_bytes"] / 1024 ** 2, 2) for record in spans],
+            "Rows": pd.array([record["rows"] for record in spans], dtype="Int64"),
+        })
+
+    def export(self, run_id: str = None):
+        '''Appends the spans of a run (by default the calling thread's run) to export_path, one JSON object per line.'''
+        if not self.enabled:
+            return
+        spans = self.get_spans(run_id)
+        with open(self.export_path, "a", encoding="utf-8") as file:
+            for record in spans:
+                file.write(json.dumps(record) + "\n")
+
+
+TRACER = Tracer()
+
+def traced(name: str = None):
+    '''Decorator recording a span on the shared TRACER; a no-op unless PNG_DASHBOARD_TRACE is set.'''
+    return TRACER.traced(name)
@@ -4,12 +4,45 @@ import folium
 from folium import Element
 import numpy as np
 import altair as alt
-from folium.plugins import MarkerCluster
+from folium.plugins import FastMarkerCluster
+from streamlit_folium import st_folium
+from html import escape
 import math
+from typing import Callable
 from Analyser import Analyser
+from SpatialGridIndex import SpatialGridIndex
+from SpeakerRangeIndex import SpeakerRangeIndex
+from LanguageSearchIndex import LanguageSearchIndex
+from Tracer import Tracer, TRACER, traced
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_map_html(cache_key: tuple, _map: folium.Map, _add_layers: Callable = None) -> str:
+    '''Renders a folium map to HTML, cached on cache_key (the map itself is not hashed).
+    _add_layers, if given, is called with the map before rendering, so its layers are only built when the HTML is not cached.'''
+    if _add_layers is not None:
+        _add_layers(_map)
+    return _map.get_root().render()
+
 class Visualiser:
     def __init__(self, analyser : Analyser):
         self.analyser = analyser
+        self.speaker_range = None # (min, max) speakers chosen with the slider
+        self.filtered_df = None # languages within speaker_range, drawn by add_filtered_map_layers
+        self.selected_language_keys = () # language_IDs chosen in the search (see get_language_keys)
+        self.search_df = None # languages the search layers are drawn from
+        self.viewport_rendering = False
+        self.viewport_layer = None
+        self.spatial_index = None
+        self.VIEWPORT_STATE_KEY = "language_map_viewport"
+        self.VIEWPORT_DETAIL_ZOOM = 8 # below this zoom the languages in view are sent as grid-cell counts
+        self.VIEWPORT_RENDERING_THRESHOLD = 2000 # viewport rendering is switched on by default above this many languages
+        self.MAP_WIDTH = 700
+        self.SEARCH_RESULT_LIMIT = 20
+        self.SEARCH_SELECTION_KEY = "language_search_selection"
+        self.BAR_CHART_COLUMNS = ["language", "plotting_data", "vitality_status", "bar_chart_tooltip_value"]
+        self.BAR_CHART_PAGE_SIZE = 50
+        self.BAR_CHART_AGGREGATE_THRESHOLD = 1000 # above this many languages the histogram is the default bar chart view
+        self.BAR_CHART_BINS_PER_DECADE = 4
+        self.MAP_HEIGHT = 550
         self.MIN_POWER_OF_TEN = -1.0
         self.ICON_CREATE_FUNCTION =  """
         function(cluster) {
@@ -29,6 +62,25 @@ class Visualiser:
         });
         }
         """
+        self.POINT_RADIUS = 15000
+        self.POINT_MARKER_CALLBACK = """
+        var callback = function (row) {
+            var circle = L.circle(new L.LatLng(row[0], row[1]), {
+                radius: row[4], color: row[2], stroke: true, fill: true, opacity: 1
+            });
+            circle.bindTooltip('<div>' + row[3] + '</div>', {sticky: true, maxWidth: 800});
+            return circle;
+        };
+        """
+        self.SEARCH_MARKER_CALLBACK = """
+        var callback = function (row) {
+            var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+                radius: 1, color: 'white', fill: true, fillColor: 'white', fillOpacity: 1.0
+            });
+            marker.bindPopup(row[2]);
+            return marker;
+        };
+        """
         self.LEGEND_HTML = """
         <div style="
             position: fixed;
@@ -154,25 +206,34 @@ class Visualiser:
     
         return "<br>".join(lines)
    
-    def display_filtered_map(self, df, map) -> pd.DataFrame:
+    @traced()
+    def display_filtered_map(self, df, map, spatial_index: SpatialGridIndex = None, speaker_range_index: SpeakerRangeIndex = None) -> pd.DataFrame:
         """
         Displays a filtered map of languages based on speaker numbers.
+        The filtered languages are kept in self.filtered_df and only drawn by add_filtered_map_layers, when display_map
+        has no cached HTML for the current filter values.
+        With viewport rendering on, only the languages in the visible area are sent (as grid-cell counts when zoomed out)
+        and the layer is kept in self.viewport_layer for display_viewport_map instead of being added to the map.
 
         Args:
             df (pd.DataFrame): DataFrame containing language data.
             map (folium.Map): Folium map object to display the data.
+            spatial_index (SpatialGridIndex, optional): Index over the latitude/longitude of df; enables the viewport rendering option. Defaults to None.
+            speaker_range_index (SpeakerRangeIndex, optional): Index over the speaker number ranges of df, ideally cached between reruns. Built here if not given.
 
         Returns:
             pd.DataFrame: Filtered DataFrame based on user-selected speaker number range.
         """
         map.get_root().html.add_child(Element(self.LEGEND_HTML))
-        max_power_of_ten = float(math.ceil(math.log10(df['speaker_number_max'].max())))
+        if speaker_range_index is None:
+            speaker_range_index = SpeakerRangeIndex(df['speaker_number_min'], df['speaker_number_max'])
+        max_power_of_ten = speaker_range_index.max_power_of_ten()
         min_power_of_ten = self.MIN_POWER_OF_TEN
 
         try:
             with st.sidebar:
                 st.header("Filter Languages by Speaker Number")
-                user_min, user_max = st.slider(
+                slider_min, slider_max = st.slider(
                 "Number of speakers",
                 min_value=min_power_of_ten,
                 max_value=max_power_of_ten,
@@ -182,32 +243,88 @@ class Visualiser:
                 )
                 st.markdown("Logarithmic scale")
 
-                if user_min == min_power_of_ten:
+                if slider_min == min_power_of_ten:
                     user_min = 0
                 else: 
-                    user_min = 10**user_min
-
-                user_max = 10**user_max
-                st.markdown(f"**Selected range:** {'{:,}'.format(int(user_min))} to {'{:,}'.format(int(user_max))} speakers")
+                    user_min = 10**slider_min
+
+                user_max = 10**slider_max
+                self.speaker_range = (user_min, user_max)
+                filtered_positions = speaker_range_index.query_slider(slider_min, slider_max, min_power_of_ten)
+                st.markdown(f"**Selected range:** {'{:,}'.format(int(user_min))} to {'{:,}'.format(int(user_max))} speakers ({len(filtered_positions):,} languages)")
+                with st.expander("Languages per range"):
+                    st.dataframe(speaker_range_index.bucket_counts(min_power_of_ten), hide_index=True)
+                if spatial_index is not None:
+                    self.viewport_rendering = st.checkbox(
+                    "Only load languages in view",
+                    value=len(df) > self.VIEWPORT_RENDERING_THRESHOLD,
+                    help="Sends only the languages inside the visible area, grouped into counts when zoomed out."
+                    )
           
-            filtered_values = np.where((df['speaker_number_max']>=user_min) & (df['speaker_number_min']<=user_max))
-            filtered_df = df.loc[filtered_values]
-    
-            cluster = folium.plugins.MarkerCluster(disableClusteringAtZoom=11, icon_create_function=self.ICON_CREATE_FUNCTION)
-            self.add_points_to_cluster(filtered_df, cluster)
-            cluster.add_to(map)
+            filtered_df = df.iloc[filtered_positions]
+
+            if self.viewport_rendering:
+                self.spatial_index = spatial_index
+                self.viewport_layer = folium.FeatureGroup(name="Languages in view")
+                self.add_viewport_points(df, filtered_positions, map, self.viewport_layer)
+                return filtered_df
+
+            self.filtered_df = filtered_df
             return filtered_df
 
         except Exception as e:
             st.error(e)
         
 
+    @traced()
+    def show_performance_panel(self, tracer: Tracer, run_id: str = None):
+        '''Shows the spans recorded during this run (run_id, by default the current thread's) in a collapsed "Performance" section of the sidebar.'''
+        with st.sidebar:
+            with st.expander("Performance", expanded=False):
+                summary = tracer.summarise(run_id)
+                st.dataframe(summary, hide_index=True)
+                st.caption(f"Spans are appended to {tracer.export_path}. Peak memory is process-wide, so it is only accurate with a single user.")
+
+    @traced()
     def show_logarithmic_bar_graph(self, df: pd.DataFrame):
-        df_plot = df[df["plotting_data"].notna()]
+        """
+        Shows the number of speakers per language, either one page of bars ranked by speaker number or a log-binned histogram.
+        Only the columns the chart uses are passed to Altair. Above BAR_CHART_AGGREGATE_THRESHOLD languages the histogram is
+        the default view, so the chart data is a few dozen pre-aggregated bins instead of one row per language.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing language data.
+        """
+        df_plot = self.prepare_bar_chart_data(df)
         st.header("Number of Speakers per Language")
-        st.write("Bar chart showing the number of speakers for each language on a logarithmic scale. Languages marked in red are classified as extinct.")
-        
-        chart = (
+        view = st.radio(
+            "Bar chart view",
+            ["Top languages", "Histogram"],
+            index=1 if len(df_plot) > self.BAR_CHART_AGGREGATE_THRESHOLD else 0,
+            horizontal=True,
+            help="Top languages shows one page of languages ranked by speaker number; Histogram counts the languages in each range."
+        )
+
+        if view == "Histogram":
+            st.write("Histogram of the number of languages in each speaker number range, on a logarithmic scale. Extinct and dormant languages are counted in red.")
+            chart = self.create_log_histogram_chart(self.create_log_histogram_data(df_plot))
+        else:
+            st.write("Bar chart showing the number of speakers for each language on a logarithmic scale. Languages marked in red are classified as extinct.")
+            page_count = max(1, math.ceil(len(df_plot) / self.BAR_CHART_PAGE_SIZE))
+            page = st.number_input(f"Page (of {page_count}, {self.BAR_CHART_PAGE_SIZE} languages each)", min_value=1, max_value=page_count, value=1)
+            start = (page - 1) * self.BAR_CHART_PAGE_SIZE
+            chart = self.create_language_bar_chart(df_plot.iloc[start:start + self.BAR_CHART_PAGE_SIZE])
+
+        st.altair_chart(chart, width= 'stretch')
+
+    def prepare_bar_chart_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''Keeps only the bar chart columns of the languages with plotting data, ranked from most to fewest speakers.'''
+        df_plot = df.loc[df["plotting_data"].notna(), self.BAR_CHART_COLUMNS]
+        df_plot = df_plot.astype({"plotting_data": float})
+        return df_plot.sort_values("plotting_data", ascending=False, kind="stable").reset_index(drop=True)
+
+    def create_language_bar_chart(self, df_plot: pd.DataFrame) -> alt.Chart:
+        return (
             alt.Chart(df_plot)
             .mark_bar()
             .encode(
@@ -230,7 +347,53 @@ class Visualiser:
             )
         )
 
-        st.altair_chart(chart, width= 'stretch')
+    def create_log_histogram_data(self, df_plot: pd.DataFrame) -> pd.DataFrame:
+        """
+        Counts the languages in logarithmic speaker number bins (BAR_CHART_BINS_PER_DECADE per power of ten).
+        Extinct and dormant languages get their own bin, since their plotting data is only a placeholder below the smallest count.
+
+        Args:
+            df_plot (pd.DataFrame): Output of prepare_bar_chart_data.
+
+        Returns:
+            pd.DataFrame: One row per non-empty bin with columns 'bin', 'order', 'Languages' and 'extinct'.
+        """
+        is_extinct = df_plot["vitality_status"].isin(["extinct", "dormant"]).to_numpy()
+        values = df_plot["plotting_data"].to_numpy()
+        living = values[~is_extinct & (values > 0)]
+        bin_index = np.floor(np.log10(living) * self.BAR_CHART_BINS_PER_DECADE).astype(int)
+        bins, counts = np.unique(bin_index, return_counts=True)
+        lower = np.power(10.0, bins / self.BAR_CHART_BINS_PER_DECADE)
+        upper = np.power(10.0, (bins + 1) / self.BAR_CHART_BINS_PER_DECADE)
+        histogram = pd.DataFrame({
+            "bin": [f"{int(round(start)):,} to {int(round(end)):,}" for start, end in zip(lower, upper)],
+            "order": bins,
+            "Languages": counts,
+            "extinct": False,
+        })
+        if is_extinct.any():
+            extinct_row = pd.DataFrame({"bin": ["Extinct/Dormant"], "order": [bins.min() - 1 if len(bins) else 0], "Languages": [int(is_extinct.sum())], "extinct": [True]})
+            histogram = pd.concat([extinct_row, histogram], ignore_index=True)
+        return histogram
+
+    def create_log_histogram_chart(self, histogram: pd.DataFrame) -> alt.Chart:
+        return (
+            alt.Chart(histogram)
+            .mark_bar()
+            .encode(
+                y=alt.Y("bin:N", sort=alt.SortField("order", order="descending"), title="Number of speakers (log bins)"),
+                x=alt.X("Languages:Q", title="Number of languages"),
+                color=alt.condition(
+                    alt.datum.extinct,
+                    alt.value("red"),
+                    alt.value("steelblue")
+                ),
+                tooltip=[
+                    alt.Tooltip("bin:N", title="Speakers"),
+                    alt.Tooltip("Languages:Q", title="Languages"),
+                ]
+            )
+        )
 
     def assign_colour_based_on_speaker_number(self, df, idx) -> pd.DataFrame:
         speaker_number = df.at[idx, 'plotting_data'] 
@@ -251,6 +414,49 @@ class Visualiser:
         else:
             return "green"
 
+    @traced()
+    def create_marker_style_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorised styling stage: adds the marker_colour and marker_tooltip_html columns for the whole DataFrame at once.
+        Gives the same results as assign_colour_based_on_speaker_number and structure_tooltip applied row by row,
+        so it can run once at load time and the map renderer only reads the precomputed columns.
+        """
+        df = df.copy()
+        speaker_number = pd.to_numeric(df["plotting_data"], errors="coerce")
+        vitality_status = df["vitality_status"]
+        df["marker_colour"] = np.select(
+            [
+                speaker_number.isna() & vitality_status.isna(),
+                vitality_status.isin(["extinct", "dormant"]),
+                speaker_number < 100,
+                speaker_number < 1000,
+                speaker_number < 10000,
+                speaker_number < 100000,
+            ],
+            ["gray", "black", "darkred", "red", "orange", "yellow"],
+            default="green",
+        )
+
+        def tooltip_line(label: str, values: pd.Series, condition: pd.Series) -> pd.Series:
+            return ("<b>" + label + ":</b> " + values.astype(str) + "<br>").where(condition, "")
+
+        speaker_number_type = df["speaker_number_type"]
+        numeric = pd.to_numeric(df["speaker_number_numeric"], errors="coerce")
+        exact = numeric.notna() & (speaker_number_type == "exact")
+        tooltip = (
+            tooltip_line("Language", df["language"], df["language"].notna())
+            + tooltip_line("Speakers", numeric.where(exact, 0).astype("int64"), exact)
+            + tooltip_line("Speakers", df["speaker_number_raw"], speaker_number_type.isin(["range", "estimate", "qualitative range", "qualitative estimate"]))
+            + tooltip_line("Year Cited", df["speaker_number_year"], df["speaker_number_year"].notna())
+            + tooltip_line("Vitality Status", vitality_status, vitality_status.notna())
+            + tooltip_line("Confidence Score", df["source_confidence"], df["source_confidence"].notna())
+            + tooltip_line("Speaker Number Type", speaker_number_type, speaker_number_type.notna())
+            + tooltip_line("Source", df["speaker_source"], df["speaker_source"].notna())
+        )
+        df["marker_tooltip_html"] = tooltip.str.removesuffix("<br>")
+        return df
+
+    @traced()
     def add_points_to_cluster(self, df: pd.DataFrame, cluster) -> folium.Map:
         for idx, row in df.iterrows():
             folium.Circle(
@@ -263,13 +469,189 @@ class Visualiser:
                 opacity = 1,
             ).add_to(cluster)
            
-    def display_map(self, map: folium.Map, filename: str):
-        '''Saves map html to a file and displays the folium map in Streamlit.'''
-        map.save(filename)
-        st.components.v1.html(open(filename, "r").read(), width=700, height=550)
+    @traced()
+    def create_point_cluster(self, df: pd.DataFrame) -> FastMarkerCluster:
+        """
+        Bulk alternative to add_points_to_cluster: emits the points once as a compact data array.
+        Colours and tooltips are read from the marker_colour and marker_tooltip_html columns (computed here if missing).
+        Each row carries [latitude, longitude, colour, tooltip HTML, radius] and POINT_MARKER_CALLBACK
+        turns it into a circle in the browser, so no folium object is built per language.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the languages to plot.
+
+        Returns:
+            FastMarkerCluster: Cluster layer ready to be added to a map.
+        """
+        df = df.dropna(subset=["latitude", "longitude"])
+        if "marker_colour" not in df.columns or "marker_tooltip_html" not in df.columns:
+            df = self.create_marker_style_columns(df)
+        data = [[latitude, longitude, colour, tooltip, self.POINT_RADIUS] for latitude, longitude, colour, tooltip in zip(df["latitude"], df["longitude"], df["marker_colour"], df["marker_tooltip_html"])]
+        return FastMarkerCluster(
+            data=data,
+            callback=self.POINT_MARKER_CALLBACK,
+            disableClusteringAtZoom=11,
+            icon_create_function=self.ICON_CREATE_FUNCTION
+        )
+
+    def estimate_bounds(self, center: tuple, zoom: int) -> tuple:
+        '''Approximate (south, west, north, east) visible in a MAP_WIDTH x MAP_HEIGHT map, used until the browser reports the real bounds.'''
+        degrees_per_pixel = 360 / (256 * 2 ** zoom)
+        half_height = self.MAP_HEIGHT / 2 * degrees_per_pixel
+        half_width = self.MAP_WIDTH / 2 * degrees_per_pixel
+        return (center[0] - half_height, center[1] - half_width, center[0] + half_height, center[1] + half_width)
+
+    def get_viewport(self, map: folium.Map) -> dict:
+        '''Returns the last viewport of the language map ({"center", "zoom", "bounds"}), starting from the map's own location and zoom.'''
+        if self.VIEWPORT_STATE_KEY not in st.session_state:
+            center = tuple(map.location)
+            zoom = map.options.get("zoom", 5)
+            st.session_state[self.VIEWPORT_STATE_KEY] = {"center": center, "zoom": zoom, "bounds": self.estimate_bounds(center, zoom)}
+        return st.session_state[self.VIEWPORT_STATE_KEY]
+
+    def set_viewport(self, center: tuple, zoom: int, bounds: tuple = None):
+        center = (float(center[0]), float(center[1]))
+        st.session_state[self.VIEWPORT_STATE_KEY] = {"center": center, "zoom": zoom, "bounds": bounds or self.estimate_bounds(center, zoom)}
+
+    def fit_viewport(self, latitudes: pd.Series, longitudes: pd.Series):
+        '''Viewport mode version of folium's fit_bounds: centres the viewport on the points, at the largest zoom
+        (up to VIEWPORT_DETAIL_ZOOM) at which they all fit in a MAP_WIDTH x MAP_HEIGHT map.'''
+        center = ((latitudes.min() + latitudes.max()) / 2, (longitudes.min() + longitudes.max()) / 2)
+        zoom = self.VIEWPORT_DETAIL_ZOOM
+        while zoom > 0:
+            south, west, north, east = self.estimate_bounds(center, zoom)
+            if south <= latitudes.min() and north >= latitudes.max() and west <= longitudes.min() and east >= longitudes.max():
+                break
+            zoom -= 1
+        self.set_viewport(center, zoom)
+
+    def add_viewport_points(self, df: pd.DataFrame, positions: np.ndarray, map: folium.Map, layer: folium.FeatureGroup):
+        """
+        Adds the languages inside the current viewport to the layer: individual points from the detail zoom onwards,
+        otherwise one marker per grid cell showing how many languages it holds, so the payload stays bounded by the screen size.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing language data (the one the spatial index was built on).
+            positions (np.ndarray): Positions of the languages that passed the speaker number filter.
+            map (folium.Map): The language map, whose location and zoom are the starting viewport.
+            layer (folium.FeatureGroup): Layer the points or cell markers are added to.
+        """
+        viewport = self.get_viewport(map)
+        positions = np.intersect1d(positions, self.spatial_index.query(*viewport["bounds"]))
+        if viewport["zoom"] >= self.VIEWPORT_DETAIL_ZOOM:
+            self.create_point_cluster(df.iloc[positions]).add_to(layer)
+            return
+
+        # a cell is roughly a quarter of a map tile wide at the current zoom
+        cells = self.spatial_index.aggregate(positions, 90 / 2 ** viewport["zoom"])
+        for latitude, longitude, count in zip(cells["latitude"], cells["longitude"], cells["count"]):
+            colour = "yellow" if count < 10 else "orange" if count < 80 else "red"
+            size = 20 + math.log(count) * 15
+            folium.Marker(
+                location=[latitude, longitude],
+                icon=folium.DivIcon(
+                    html=f'<div style="width:{size}px; height:{size}px; line-height:{size}px; border-radius:50%; background-color:{colour}; color:black; text-align:center;"><span>{count}</span></div>',
+                    icon_size=(size, size),
+                    icon_anchor=(size / 2, size / 2),
+                ),
+                tooltip=f"{count} languages",
+            ).add_to(layer)
+
+    @traced()
+    def display_viewport_map(self, map: folium.Map):
+        """
+        Displays the language map with streamlit-folium and sends only self.viewport_layer on each rerun.
+        The base map is drawn once; when the user pans or zooms, the reported bounds and zoom are stored
+        and the script reruns so the layer is rebuilt for the new viewport.
+
+        Args:
+            map (folium.Map): Folium map object without the language points.
+        """
+        viewport = self.get_viewport(map)
+        output = st_folium(
+            map,
+            key=f"{self.VIEWPORT_STATE_KEY}_component",
+            center=viewport["center"],
+            zoom=viewport["zoom"],
+            feature_group_to_add=self.viewport_layer,
+            returned_objects=["bounds", "zoom", "center"],
+            width=self.MAP_WIDTH,
+            height=self.MAP_HEIGHT,
+        )
+        if not output or not output.get("bounds") or output.get("zoom") is None:
+            return
+        bounds = (output["bounds"]["_southWest"]["lat"], output["bounds"]["_southWest"]["lng"], output["bounds"]["_northEast"]["lat"], output["bounds"]["_northEast"]["lng"])
+        if None in bounds:
+            # nothing reported by the browser yet
+            return
+        center = output.get("center") or {"lat": (bounds[0] + bounds[2]) / 2, "lng": (bounds[1] + bounds[3]) / 2}
+        reported = {
+            "center": (round(center["lat"], 4), round(center["lng"], 4)),
+            "zoom": output["zoom"],
+            "bounds": tuple(round(value, 4) for value in bounds),
+        }
+        # only react to a new report from the browser, not to a viewport set by the app (e.g. the language search)
+        last_reported_key = f"{self.VIEWPORT_STATE_KEY}_last_reported"
+        if st.session_state.get(last_reported_key) != reported:
+            st.session_state[last_reported_key] = reported
+            st.session_state[self.VIEWPORT_STATE_KEY] = reported
+            st.rerun()
+
+    def filtered_map_cache_key(self, data_version) -> tuple:
+        '''Render cache key of the filtered map: the data version and the filter values its layers are built from.'''
+        return ("filtered_map", data_version, self.speaker_range, self.selected_language_keys)
+
+    @traced()
+    def add_filtered_map_layers(self, map: folium.Map):
+        '''Adds the layers for the current filter values to the filtered map: the languages within the speaker range
+        (from display_filtered_map) and the search layers (from search_for_language).'''
+        if self.filtered_df is not None:
+            self.create_point_cluster(self.filtered_df).add_to(map)
+        if self.search_df is not None:
+            self.add_search_layers(self.search_df, map, list(self.selected_language_keys))
+
+    @traced()
+    def display_map(self, map: folium.Map, cache_key: tuple = None, export_filename: str = None, add_layers: Callable = None):
+        """
+        Renders the folium map in memory and displays it in Streamlit.
+
+        Args:
+            map (folium.Map): Folium map object to display.
+            cache_key (tuple, optional): Describes everything the map depends on (data version and filter values).
+                Maps with the same key reuse the HTML rendered for the first one. Defaults to None (always render).
+            export_filename (str, optional): If given, the HTML is also written to this file. Defaults to None.
+            add_layers (Callable, optional): Called with the map to add its layers, only when the HTML is not cached. Defaults to None.
+        """
+        with TRACER.span("render map HTML"):
+            if cache_key is None:
+                if add_layers is not None:
+                    add_layers(map)
+                html = map.get_root().render()
+            else:
+                html = render_map_html(cache_key, map, add_layers)
+        if export_filename is not None:
+            with open(export_filename, "w", encoding="utf-8") as file:
+                file.write(html)
+        with TRACER.span("embed map HTML"):
+            st.components.v1.html(html, width=700, height=550)
          
-    def create_choropleth(self, geo_data, frequency_data, map: folium.Map):
-        folium.Choropleth(
+    @traced()
+    def create_choropleth(self, geo_data, frequency_data, map: folium.Map, topojson_object: str = None):
+        """
+        Adds the province choropleth to the map as a single layer: the fill, outline, highlight and tooltip
+        all come from the one geometry layer, so the boundaries are only sent to the browser once.
+        geo_data is never modified, so a cached structure from create_enriched_boundaries can be passed on every rerun.
+
+        Args:
+            geo_data (dict): GeoJSON FeatureCollection, or a TopoJSON topology if topojson_object is given.
+                Enriched with language counts here if it does not carry them yet.
+            frequency_data (pd.DataFrame): DataFrame containing language counts by province.
+            map (folium.Map): Folium map object to which the choropleth is added.
+            topojson_object (str, optional): Name of the object inside the topology holding the provinces. Defaults to None (GeoJSON).
+        """
+        if not self.has_language_counts(geo_data, topojson_object):
+            geo_data = self.create_enriched_boundaries(geo_data, frequency_data, topojson_object)
+        choropleth = folium.Choropleth(
             geo_data=geo_data,
             data=frequency_data,
             fill_opacity= 1.0,
@@ -277,28 +659,59 @@ class Visualiser:
             legend_name="Number of Languages",
             columns=["Province", "Number of Languages"],
             key_on="feature.properties.shapeName",
+            topojson=f"objects.{topojson_object}" if topojson_object else None,
         ).add_to(map)
 
-        self.add_geojson_tooltip(geo_data, frequency_data, map)
-        
+        folium.GeoJsonTooltip(
+            fields=["shapeName", "Number of Languages"],
+            aliases=["Province:", "Number of Languages:"]
+        ).add_to(choropleth.geojson)
+
+    def get_province_features(self, geo_data: dict, topojson_object: str = None) -> list:
+        if topojson_object:
+            return geo_data["objects"][topojson_object]["geometries"]
+        return geo_data["features"]
+
+    def has_language_counts(self, geo_data: dict, topojson_object: str = None) -> bool:
+        return all("Number of Languages" in feature["properties"] for feature in self.get_province_features(geo_data, topojson_object))
+
+    @traced()
+    def create_enriched_boundaries(self, geo_data: dict, df: pd.DataFrame, topojson_object: str = None) -> dict:
+        """
+        Builds a copy of the boundaries whose features carry a "Number of Languages" property (0 for provinces without languages).
+        The counts are joined through a Province -> count dict, so the cost is one lookup per feature.
+        Only the feature list and properties are copied; the geometry (or TopoJSON arcs) is shared with geo_data, which is left unchanged.
+
+        Args:
+            geo_data (dict): GeoJSON FeatureCollection, or a TopoJSON topology if topojson_object is given.
+            df (pd.DataFrame): DataFrame containing language counts by province.
+            topojson_object (str, optional): Name of the object inside the topology holding the provinces. Defaults to None (GeoJSON).
+
+        Returns:
+            dict: The enriched boundaries; treat as read-only so it can be cached and shared between reruns.
+        """
+        counts = dict(zip(df["Province"], df["Number of Languages"].astype(int)))
+        features = [
+            {**feature, "properties": {**feature["properties"], "Number of Languages": counts.get(feature["properties"]["shapeName"], 0)}}
+            for feature in self.get_province_features(geo_data, topojson_object)
+        ]
+        if topojson_object:
+            objects = {**geo_data["objects"], topojson_object: {**geo_data["objects"][topojson_object], "geometries": features}}
+            return {**geo_data, "objects": objects}
+        return {**geo_data, "features": features}
+
     def add_geojson_tooltip(self, geo_data: dict, df: pd.DataFrame, map: folium.Map):
         """
         Adds tooltips to a GeoJSON layer on the map, displaying the number of languages per province.
+        create_choropleth attaches the tooltip to its own layer; this separate overlay is kept for maps without a fill.
 
         Args:
-            geo_data (dict): GeoJSON data defining the map regions.
+            geo_data (dict): GeoJSON data defining the map regions (not modified).
             df (pd.DataFrame): DataFrame containing language counts by province.
             map (folium.Map): Folium map object to which the tooltips are added.
         """      
-        for feature in geo_data["features"]:
-            province = feature["properties"]["shapeName"]
-            row = df[df["Province"] == province]
-            if not row.empty:
-                feature["properties"]["Number of Languages"] = int(
-                    row["Number of Languages"].iloc[0]
-                )
-            else:
-                feature["properties"]["Number of Languages"] = 0
+        if not self.has_language_counts(geo_data):
+            geo_data = self.create_enriched_boundaries(geo_data, df)
 
         folium.GeoJson(
                 geo_data,
@@ -317,73 +730,121 @@ class Visualiser:
                 )
         ).add_to(map)
 
-    def search_for_language(self, df, map: folium.Map):
+    @traced()
+    def search_for_language(self, df, map: folium.Map, search_index: LanguageSearchIndex = None):
         """
-        Searches for a specific language in the dataset by its name.
+        Searches for languages by name, language_ID or dialect name (link label) and highlights the chosen ones on the map.
+        Only the best SEARCH_RESULT_LIMIT matches for the typed text are sent to the browser, instead of every language name.
 
         Args:
             df (pd.DataFrame): The DataFrame containing language data.
-            language_name (str): The name of the language to search for.
-
-        Returns:
-            pd.DataFrame: A filtered DataFrame containing rows that match the specified language name.
+            map (folium.Map): Folium map object the language layers are added to.
+            search_index (LanguageSearchIndex, optional): Index over the languages of df, ideally cached between reruns. Built here if not given.
         """   
-        
-        options = ['All languages'] + df['language'].dropna().unique().tolist()
+        if search_index is None:
+            search_index = LanguageSearchIndex(df['language'], df['language_ID'], df['links'] if 'links' in df.columns else None)
         with st.sidebar:
             st.header('Language Search')
-            st.write('Use the dropdown menu to search for a specific language and highlight it on the map.')
-            selected_language = st.sidebar.selectbox(
+            st.write('Type a language name, glottocode or dialect name and pick one or more matches to highlight them on the map.')
+            query = st.text_input(
             "Search for a language",
+            help = "Matches names, glottocodes and dialect names, including approximate spellings."
+            )
+            # the selection is stored as language keys, which stay valid when the data changes, unlike row positions
+            language_keys = self.get_language_keys(df).tolist()
+            position_by_key = {key: position for position, key in enumerate(language_keys)}
+            matches = search_index.search(query, self.SEARCH_RESULT_LIMIT) if query else []
+            matched_terms = {language_keys[position]: term for position, term, _ in matches}
+            selected_keys = [key for key in st.session_state.get(self.SEARCH_SELECTION_KEY, []) if key in position_by_key]
+            if self.SEARCH_SELECTION_KEY in st.session_state:
+                st.session_state[self.SEARCH_SELECTION_KEY] = selected_keys # drop languages no longer in the data
+            options = list(dict.fromkeys(selected_keys + list(matched_terms)))
+
+            def format_option(key: str) -> str:
+                position = position_by_key[key]
+                label = f"{df['language'].iloc[position]} ({df['language_ID'].iloc[position]})"
+                term = matched_terms.get(key)
+                if term is not None and term not in (df['language'].iloc[position], df['language_ID'].iloc[position]):
+                    label += f" - {term}"
+                return label
+
+            selected_keys = st.multiselect(
+            "Languages to highlight",
             options,
-            help = "Select a language to highlight it on the map."
+            key=self.SEARCH_SELECTION_KEY,
+            format_func=format_option,
+            help = "Select languages to highlight them on the map."
             )
-        if selected_language != "All languages":
-            df_to_plot = df[df["language"] == selected_language]
+        self.selected_language_keys = tuple(selected_keys)
+        if self.viewport_rendering:
+            self.add_viewport_search_layers(df, map, selected_keys)
         else:
-            df_to_plot = df     
-        for _, row in df.iterrows():
-            is_selected = (
-                selected_language != "All languages"
-                and row["language"] == selected_language )
-
-            color = "red" if is_selected else "white"
-            radius = 8 if is_selected else 1
-
-            cluster = MarkerCluster(
-                name="Languages",
-                disableClusteringAtZoom=9,
-                icon_create_function=self.ICON_CREATE_FUNCTION
-            ).add_to(map)
-
-            folium.CircleMarker(
-                location=[row["latitude"], row["longitude"]],
-                radius=radius,
-                color=color,
-                fill=True,
-                fill_color=color,
-                fill_opacity=1.0,
-                popup=row["language"]
-            ).add_to(cluster)
+            # drawn by add_filtered_map_layers, only if the map is not already rendered for this selection
+            self.search_df = df
+        selected_names = df['language'].iloc[[position_by_key[key] for key in selected_keys]].tolist()
+        st.success(f'Showing {", ".join(selected_names) if selected_names else "all languages"} on the map...')
+
+    def get_language_keys(self, df: pd.DataFrame) -> pd.Series:
+        '''Returns the key the search selects languages by: the language_ID, or the name for a language without one.'''
+        return df['language_ID'].fillna(df['language'])
+
+    def add_viewport_search_layers(self, df: pd.DataFrame, map: folium.Map, selected_language_keys: list):
+        '''Viewport rendering version of add_search_layers: the search markers go into self.viewport_layer and only cover the
+        languages in view at the detail zoom. Changing the selection moves the viewport to the selected languages
+        (the layer cannot move the map, so the viewport is set instead of the map's location or bounds).'''
+        is_selected = self.get_language_keys(df).isin(selected_language_keys) & df["latitude"].notna() & df["longitude"].notna()
+        previous_key = f"{self.VIEWPORT_STATE_KEY}_selected_language"
+        if is_selected.any() and st.session_state.get(previous_key) != selected_language_keys:
+            self.fit_viewport(df.loc[is_selected, "latitude"], df.loc[is_selected, "longitude"])
+        st.session_state[previous_key] = selected_language_keys
+
+        viewport = self.get_viewport(map)
+        in_view = np.zeros(len(df), dtype=bool)
+        if viewport["zoom"] >= self.VIEWPORT_DETAIL_ZOOM:
+            in_view[self.spatial_index.query(*viewport["bounds"])] = True
+        self.add_search_layers(df[in_view | is_selected.to_numpy()], self.viewport_layer, selected_language_keys)
+
+    @traced()
+    def add_search_layers(self, df: pd.DataFrame, map: folium.Map, selected_language_keys: list = ()):
+        """
+        Adds every language to the map as one client-side marker cluster, plus a separate highlight layer for the selected languages.
 
-            if selected_language != "All languages":
-                bounds = df_to_plot[["latitude", "longitude"]].values.tolist()
-                latitude = bounds[0][0]
-                longitude = bounds[0][1]
-                map.location = [latitude, longitude]
+        Args:
+            df (pd.DataFrame): The DataFrame containing language data.
+            map (folium.Map): Folium map object the layers are added to.
+            selected_language_keys (list, optional): language_IDs (see get_language_keys) of the languages to highlight and centre the map on
+                (a single one is accepted too). Defaults to none.
+        """
+        if isinstance(selected_language_keys, str):
+            selected_language_keys = [selected_language_keys]
+        df = df.dropna(subset=["latitude", "longitude"])
+        is_selected = self.get_language_keys(df).isin(selected_language_keys)
+
+        FastMarkerCluster(
+            data=[[latitude, longitude, escape(str(language))] for latitude, longitude, language in zip(df.loc[~is_selected, "latitude"], df.loc[~is_selected, "longitude"], df.loc[~is_selected, "language"])],
+            callback=self.SEARCH_MARKER_CALLBACK,
+            name="Languages",
+            disableClusteringAtZoom=9,
+            icon_create_function=self.ICON_CREATE_FUNCTION
+        ).add_to(map)
 
-         
+        if is_selected.any():
+            highlight = folium.FeatureGroup(name="Selected languages").add_to(map)
+            df_to_plot = df[is_selected]
+            for latitude, longitude, language in zip(df_to_plot["latitude"], df_to_plot["longitude"], df_to_plot["language"]):
+                folium.CircleMarker(
+                    location=[latitude, longitude],
+                    radius=8,
+                    color="red",
+                    fill=True,
+                    fill_color="red",
+                    fill_opacity=1.0,
+                    popup=language
+                ).add_to(highlight)
+            # in viewport mode map is self.viewport_layer, which cannot move the map; add_viewport_search_layers sets the viewport instead
+            if not isinstance(map, folium.Map):
+                return
+            if len(df_to_plot) == 1:
+                map.location = [df_to_plot["latitude"].iloc[0], df_to_plot["longitude"].iloc[0]]
             else:
-                    pass
-        st.success(f'Showing {selected_language} on the map...')
-
-        
-
-            
-        
-            
-                
-            
-
-    
-        
+                map.fit_bounds([[df_to_plot["latitude"].min(), df_to_plot["longitude"].min()], [df_to_plot["latitude"].max(), df_to_plot["longitude"].max()]])
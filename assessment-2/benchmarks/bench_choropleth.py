@@ -0,0 +1,51 @@
+'''Benchmark: the original choropleth (full resolution boundaries, separate tooltip overlay) vs the prepared one
+(simplified and quantized boundaries, tooltip on the choropleth layer). Reports vertex count, boundary bytes,
+render time and page weight at a few simplification tolerances.
+Run from the assessment-2 directory: python -m benchmarks.bench_choropleth'''
+import copy
+import json
+import tempfile
+import time
+import folium
+from Analyser import Analyser
+from BoundaryPreparer import BoundaryPreparer
+from DataLoader import DataLoader
+from Visualiser import Visualiser
+
+SOURCE_PATH = "data/geoBoundaries-PNG-ADM1.geojson"
+TOLERANCES = [0.001, 0.005, 0.01]
+
+def render(add_layers) -> tuple:
+    map = folium.Map(location=(-6.5, 147.0), zoom_start=5)
+    add_layers(map)
+    start = time.perf_counter()
+    html = map.get_root().render()
+    return time.perf_counter() - start, len(html.encode("utf-8")) / 1024
+
+def main():
+    analyser = Analyser()
+    visualiser = Visualiser(analyser)
+    boundaries = DataLoader().load_data_from_json(SOURCE_PATH)
+    language_df = DataLoader().load_data_from_csv("data/language_speaker_data_clean.csv")
+    frequency_data = analyser.build_province_language_mapping(boundaries, language_df)
+
+    def original_layers(map):
+        geo_data = copy.deepcopy(boundaries)
+        folium.Choropleth(geo_data=geo_data, data=frequency_data, fill_opacity=1.0, highlight=True, legend_name="Number of Languages",
+                          columns=["Province", "Number of Languages"], key_on="feature.properties.shapeName").add_to(map)
+        visualiser.add_geojson_tooltip(geo_data, frequency_data, map)
+
+    summary = BoundaryPreparer().summarise(boundaries)
+    render_s, html_kb = render(original_layers)
+    print(f"{'boundaries':>18} {'vertices':>9} {'data (KB)':>10} {'render (s)':>11} {'page (KB)':>10}")
+    print(f"{'original':>18} {summary['vertices']:>9} {summary['bytes'] / 1024:>10.1f} {render_s:>11.3f} {html_kb:>10.1f}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for tolerance in TOLERANCES:
+            boundary_preparer = BoundaryPreparer(cache_dir, tolerance=tolerance)
+            prepared = boundary_preparer.prepare(SOURCE_PATH)
+            summary = boundary_preparer.summarise(prepared)
+            render_s, html_kb = render(lambda map: visualiser.create_choropleth(json.loads(json.dumps(prepared)), frequency_data, map))
+            print(f"{f'tolerance {tolerance}':>18} {summary['vertices']:>9} {summary['bytes'] / 1024:>10.1f} {render_s:>11.3f} {html_kb:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+'''Benchmark: row-wise Processor.clean_speaker_number vs the vectorised Processor.clean_speaker_numbers.
+Run from the assessment-2 directory: python -m benchmarks.bench_cleaning'''
+import time
+import pandas as pd
+from Processor import Processor
+
+SCALES = [1, 10, 100]
+CLEANED_COLUMNS = ["speaker_number_numeric", "speaker_number_type", "speaker_number_min", "speaker_number_max", "speaker_number_year"]
+
+def time_call(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def assert_same_output(row_wise_df: pd.DataFrame, vectorised_df: pd.DataFrame):
+    for column in CLEANED_COLUMNS:
+        row_wise = row_wise_df[column].astype(object).where(row_wise_df[column].notna(), None)
+        vectorised = vectorised_df[column].astype(object).where(vectorised_df[column].notna(), None)
+        if column not in ("speaker_number_type", "speaker_number_year"):
+            row_wise, vectorised = pd.to_numeric(row_wise), pd.to_numeric(vectorised)
+        different = ~((row_wise == vectorised) | (row_wise.isna() & vectorised.isna()))
+        if different.any():
+            raise AssertionError(f"{column} differs in {different.sum()} rows")
+
+def main():
+    processor = Processor()
+    df = pd.read_csv("data/language_speaker_data.csv") # raw scrape output: the cleaned columns are empty, so both cleaners fill them from scratch
+    print(f"{'rows':>8} {'row-wise (s)':>13} {'vectorised (s)':>15} {'speed-up':>9}")
+    for scale in SCALES:
+        scaled_df = pd.concat([df] * scale, ignore_index=True)
+        row_wise_df, row_wise_time = time_call(lambda frame: frame.apply(processor.clean_speaker_number, axis=1), scaled_df)
+        vectorised_df, vectorised_time = time_call(processor.clean_speaker_numbers, scaled_df)
+        assert_same_output(row_wise_df, vectorised_df)
+        print(f"{len(scaled_df):>8} {row_wise_time:>13.3f} {vectorised_time:>15.3f} {row_wise_time / vectorised_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
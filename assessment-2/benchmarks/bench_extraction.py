@@ -0,0 +1,63 @@
+'''Benchmark: extracting the speaker numbers from the cached pages one at a time in this process (as
+scrape_data_in_class_field_from_website does) vs Scraper.extract_speaker_numbers with 1, 2, 4, ... worker processes.
+The jobs are the source URL of every language in the clean dataset, repeated --repeat times; only pages already in the
+page cache are used, so nothing is fetched. Reports throughput and speed-up, and checks every run returns the serial values.
+Run from the assessment-2 directory: python -m benchmarks.bench_extraction [--cache-dir cache] [--repeat 4]'''
+import argparse
+import os
+import time
+from DataLoader import DataLoader
+from Scraper import Scraper
+from ScrapingConfig import DEFAULT_SCRAPING_CONFIGS
+
+def create_jobs(scraper: Scraper, data_path: str) -> list:
+    '''(url, ScrapingConfig) for every language whose source page is cached.'''
+    data_loader = DataLoader()
+    df = data_loader.load_dataset(data_path)
+    configs = {scraping_config.domain_name: scraping_config for scraping_config in DEFAULT_SCRAPING_CONFIGS}
+    page_cache = scraper.get_page_cache()
+    jobs = []
+    for speaker_source, source_urls in zip(df['speaker_source'], data_loader.parse_list_column(df['source_urls'])):
+        if speaker_source in configs and source_urls and page_cache.get_entry(source_urls[0]) is not None:
+            jobs.append((source_urls[0], configs[speaker_source]))
+    return jobs
+
+def extract_serially(scraper: Scraper, jobs: list) -> list:
+    page_cache = scraper.get_page_cache()
+    values = []
+    for url, scraping_config in jobs:
+        values.append(scraper.extractor.extract(page_cache.get(url), domain=scraper.get_domain(url), html_class_field=scraping_config.speaker_number_html_field, string_expression=scraping_config.string_expression, attribute1=scraping_config.attribute1, attribute2=scraping_config.attribute2, method_called_after_label_identified=scraping_config.method_called_after_label_identified))
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and process-pool extraction of the cached pages.")
+    parser.add_argument("--cache-dir", default="cache")
+    parser.add_argument("--data", default="data/language_speaker_data_clean.csv")
+    parser.add_argument("--repeat", type=int, default=4, help="Times each page is extracted, to make the batch larger.")
+    parser.add_argument("--workers", type=int, nargs="+", help="Process counts to try (default: powers of two up to the CPU count).")
+    args = parser.parse_args()
+
+    scraper = Scraper()
+    scraper.CACHE_DIR = args.cache_dir
+    jobs = create_jobs(scraper, args.data) * args.repeat
+    cpu_count = os.cpu_count() or 1
+    worker_counts = args.workers or [2 ** power for power in range(cpu_count.bit_length()) if 2 ** power <= cpu_count]
+    print(f"{len(jobs)} jobs, {cpu_count} CPUs")
+
+    start = time.perf_counter()
+    serial_values = extract_serially(scraper, jobs)
+    serial_time = time.perf_counter() - start
+    print(f"{'mode':>12} {'time (s)':>9} {'pages/s':>8} {'speed-up':>9}")
+    print(f"{'serial':>12} {serial_time:>9.2f} {len(jobs) / serial_time:>8.1f} {1.0:>9.2f}")
+
+    for worker_count in worker_counts:
+        start = time.perf_counter()
+        values, errors = scraper.extract_speaker_numbers(jobs, max_workers=worker_count)
+        elapsed = time.perf_counter() - start
+        scraper.close_extraction_pool() # so the next run starts a pool of its own size
+        assert values == serial_values, "process-pool extraction returned different values"
+        assert not errors, errors[:3]
+        print(f"{f'{worker_count} processes':>12} {elapsed:>9.2f} {len(jobs) / elapsed:>8.1f} {serial_time / elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
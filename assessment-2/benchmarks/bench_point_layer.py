@@ -0,0 +1,42 @@
+'''Benchmark: per-marker folium.Circle objects (add_points_to_cluster) vs the bulk FastMarkerCluster data array (create_point_cluster).
+Reports layer build time, HTML render time and page weight at 1x, 10x and 100x the current languages.
+Run from the assessment-2 directory: python -m benchmarks.bench_point_layer'''
+import time
+import folium
+import pandas as pd
+from folium.plugins import MarkerCluster
+from Analyser import Analyser
+from Visualiser import Visualiser
+
+SCALES = [1, 10, 100]
+
+def measure(build_layer, df: pd.DataFrame, location: tuple) -> dict:
+    map = folium.Map(location=location, zoom_start=5)
+    start = time.perf_counter()
+    build_layer(df).add_to(map)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    html = map.get_root().render()
+    render_time = time.perf_counter() - start
+    return {"build_s": build_time, "render_s": render_time, "html_kb": len(html.encode("utf-8")) / 1024}
+
+def main():
+    analyser = Analyser()
+    visualiser = Visualiser(analyser)
+    df = pd.read_csv("data/language_speaker_data_clean.csv")
+    location = analyser.find_midpoint_coordinates(df)
+
+    def per_marker_layer(frame):
+        cluster = MarkerCluster(disableClusteringAtZoom=11, icon_create_function=visualiser.ICON_CREATE_FUNCTION)
+        visualiser.add_points_to_cluster(frame, cluster)
+        return cluster
+
+    print(f"{'rows':>7} {'mode':>10} {'build (s)':>10} {'render (s)':>11} {'HTML (KB)':>10}")
+    for scale in SCALES:
+        scaled_df = pd.concat([df] * scale, ignore_index=True)
+        for mode, build_layer in [("per-marker", per_marker_layer), ("bulk", visualiser.create_point_cluster)]:
+            result = measure(build_layer, scaled_df, location)
+            print(f"{len(scaled_df):>7} {mode:>10} {result['build_s']:>10.3f} {result['render_s']:>11.3f} {result['html_kb']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
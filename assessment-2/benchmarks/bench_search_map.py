@@ -0,0 +1,52 @@
+'''Benchmark: language search layers before (one MarkerCluster per language) and after (one FastMarkerCluster plus a highlight layer).
+Reports the time to build the layers, the time to render the map HTML and the HTML size.
+Run from the assessment-2 directory: python -m benchmarks.bench_search_map'''
+import time
+import folium
+import pandas as pd
+from folium.plugins import MarkerCluster
+from Analyser import Analyser
+from Visualiser import Visualiser
+
+SELECTED_LANGUAGE = "Tok Pisin"
+
+def add_search_layers_per_language_clusters(visualiser: Visualiser, df: pd.DataFrame, map: folium.Map, selected_language: str):
+    '''The previous search_for_language loop, without the Streamlit widgets.'''
+    df_to_plot = df[df["language"] == selected_language]
+    for _, row in df.iterrows():
+        is_selected = row["language"] == selected_language
+        color = "red" if is_selected else "white"
+        radius = 8 if is_selected else 1
+        cluster = MarkerCluster(name="Languages", disableClusteringAtZoom=9, icon_create_function=visualiser.ICON_CREATE_FUNCTION).add_to(map)
+        folium.CircleMarker(location=[row["latitude"], row["longitude"]], radius=radius, color=color, fill=True,
+                            fill_color=color, fill_opacity=1.0, popup=row["language"]).add_to(cluster)
+        bounds = df_to_plot[["latitude", "longitude"]].values.tolist()
+        map.location = [bounds[0][0], bounds[0][1]]
+
+def measure(add_layers, df: pd.DataFrame, location: tuple) -> dict:
+    map = folium.Map(location=location, zoom_start=5)
+    start = time.perf_counter()
+    add_layers(df, map)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    html = map.get_root().render()
+    render_time = time.perf_counter() - start
+    return {"build_s": build_time, "render_s": render_time, "html_kb": len(html.encode("utf-8")) / 1024}
+
+def main():
+    analyser = Analyser()
+    visualiser = Visualiser(analyser)
+    df = pd.read_csv("data/language_speaker_data_clean.csv")
+    location = analyser.find_midpoint_coordinates(df)
+    selected_language_keys = visualiser.get_language_keys(df)[df["language"] == SELECTED_LANGUAGE].tolist()
+    results = {
+        "before": measure(lambda frame, map: add_search_layers_per_language_clusters(visualiser, frame, map, SELECTED_LANGUAGE), df, location),
+        "after": measure(lambda frame, map: visualiser.add_search_layers(frame, map, selected_language_keys), df, location),
+    }
+    print(f"{len(df)} languages, '{SELECTED_LANGUAGE}' selected")
+    print(f"{'':>8} {'build (s)':>10} {'render (s)':>11} {'HTML (KB)':>10}")
+    for name, result in results.items():
+        print(f"{name:>8} {result['build_s']:>10.3f} {result['render_s']:>11.3f} {result['html_kb']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+'''Benchmark: loading the clean language dataset from CSV (pd.read_csv, plus parsing the stringified list columns)
+vs the typed Parquet file (DataLoader.load_data_from_parquet). Reports load time, file size and in-memory size
+at 1x, 10x and 100x the current languages.
+Run from the assessment-2 directory: python -m benchmarks.bench_storage'''
+import os
+import tempfile
+import time
+import pandas as pd
+from DataLoader import DataLoader
+
+SCALES = [1, 10, 100]
+REPEATS = 3
+
+def best_time(function) -> tuple:
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    data_loader = DataLoader()
+    df = data_loader.load_data_from_csv("data/language_speaker_data_clean.csv")
+
+    def load_csv_with_lists(path):
+        csv_df = data_loader.load_data_from_csv(path)
+        for column in data_loader.LIST_COLUMN_TYPES:
+            csv_df[column] = data_loader.parse_list_column(csv_df[column])
+        return csv_df
+
+    print(f"{'rows':>7} {'format':>17} {'load (s)':>9} {'file (KB)':>10} {'memory (KB)':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in SCALES:
+            scaled_df = pd.concat([df] * scale, ignore_index=True)
+            csv_path = os.path.join(directory, f"languages_{scale}.csv")
+            parquet_path = os.path.join(directory, f"languages_{scale}.parquet")
+            data_loader.write_df_to_csv(scaled_df, csv_path)
+            data_loader.write_df_to_parquet(scaled_df, parquet_path)
+            for label, path, load in [
+                ("csv", csv_path, data_loader.load_data_from_csv),
+                ("csv + list parse", csv_path, load_csv_with_lists),
+                ("parquet", parquet_path, data_loader.load_data_from_parquet),
+                ("parquet, no lists", parquet_path, lambda path: data_loader.load_data_from_parquet(path, skip_list_columns=True)),
+            ]:
+                load_time, loaded = best_time(lambda: load(path))
+                memory = loaded.memory_usage(deep=True).sum() / 1024
+                print(f"{len(scaled_df):>7} {label:>17} {load_time:>9.3f} {os.path.getsize(path) / 1024:>10.1f} {memory:>12.1f}")
+
+if __name__ == "__main__":
+    main()
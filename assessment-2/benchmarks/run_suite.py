@@ -0,0 +1,167 @@
+'''Benchmark suite for the pipeline stages, on the real data and on synthetic datasets of 10k and 100k languages.
+Each stage is timed REPEATS times (best and mean are kept) and the results are written to a JSON file together with
+the git commit and package versions. Passing --baseline compares against an earlier results file and exits with
+status 1 if any stage got slower than --threshold times its baseline, so it can gate a deploy.
+Row-wise legacy stages are skipped above ROW_WISE_MAX_ROWS languages.
+Run from the assessment-2 directory: python -m benchmarks.run_suite [--sizes real 10000 100000] [--baseline results.json]'''
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import folium
+import numpy as np
+import pandas as pd
+import shapely
+from folium.plugins import MarkerCluster
+from Analyser import Analyser
+from BoundaryPreparer import BoundaryPreparer
+from DataLoader import DataLoader
+from Processor import Processor
+from Visualiser import Visualiser
+from benchmarks.synthetic_data import LANGUAGE_DATA_PATH, BOUNDARIES_PATH, write_synthetic_data
+
+REPEATS = 3
+ROW_WISE_MAX_ROWS = 10000
+SYNTHETIC_DATA_DIR = "benchmarks/data"
+RESULTS_DIR = "benchmarks/results"
+
+def get_data_paths(size: str) -> tuple:
+    '''Returns (language CSV, boundaries GeoJSON) for a size; synthetic data is generated on first use and reused after that.'''
+    if size == "real":
+        return LANGUAGE_DATA_PATH, BOUNDARIES_PATH
+    language_path = os.path.join(SYNTHETIC_DATA_DIR, f"languages_{size}.csv")
+    boundaries_path = os.path.join(SYNTHETIC_DATA_DIR, f"boundaries_{size}.geojson")
+    if not (os.path.exists(language_path) and os.path.exists(boundaries_path)):
+        print(f"Generating synthetic data for {size} languages...")
+        write_synthetic_data(int(size), SYNTHETIC_DATA_DIR)
+    return language_path, boundaries_path
+
+def create_stages(language_path: str, boundaries_path: str, cache_dir: str) -> list:
+    '''Returns (name, row_wise, function) for every benchmarked stage. Inputs are loaded once here, outside the timings.'''
+    data_loader = DataLoader()
+    processor = Processor()
+    analyser = Analyser()
+    visualiser = Visualiser(analyser)
+    df = data_loader.load_data_from_csv(language_path)
+    boundaries = data_loader.load_data_from_json(boundaries_path)
+    location = analyser.find_midpoint_coordinates(df)
+    province_mapping = analyser.build_province_language_mapping(boundaries, df)
+    display_boundaries = BoundaryPreparer(cache_dir).prepare(boundaries_path)
+    styled_df = visualiser.create_marker_style_columns(df)
+
+    def add_points_to_cluster():
+        cluster = MarkerCluster(disableClusteringAtZoom=11, icon_create_function=visualiser.ICON_CREATE_FUNCTION)
+        visualiser.add_points_to_cluster(df, cluster)
+
+    def filtered_map_html():
+        map = folium.Map(location=location, zoom_start=5)
+        visualiser.create_point_cluster(styled_df).add_to(map)
+        visualiser.add_search_layers(styled_df, map)
+        return map.get_root().render()
+
+    def choropleth_map_html():
+        map = folium.Map(location=location, zoom_start=5)
+        enriched_boundaries = visualiser.create_enriched_boundaries(display_boundaries, province_mapping)
+        visualiser.create_choropleth(enriched_boundaries, province_mapping, map)
+        return map.get_root().render()
+
+    def prepare_boundaries():
+        with tempfile.TemporaryDirectory() as directory:
+            BoundaryPreparer(directory).prepare(boundaries_path)
+
+    return [
+        ("load_data_from_csv", False, lambda: data_loader.load_data_from_csv(language_path)),
+        ("load_data_from_json", False, lambda: data_loader.load_data_from_json(boundaries_path)),
+        ("clean_speaker_number (row-wise)", True, lambda: df.apply(processor.clean_speaker_number, axis=1)),
+        ("clean_speaker_numbers", False, lambda: processor.clean_speaker_numbers(df)),
+        ("create_plotting_data_column", False, lambda: analyser.create_plotting_data_column(df.copy())),
+        ("build_province_language_mapping", False, lambda: analyser.build_province_language_mapping(boundaries, df)),
+        ("create_marker_style_columns", False, lambda: visualiser.create_marker_style_columns(df)),
+        ("add_points_to_cluster (row-wise)", True, add_points_to_cluster),
+        ("prepare_boundaries", False, prepare_boundaries),
+        ("filtered_map_html", False, filtered_map_html),
+        ("choropleth_map_html", False, choropleth_map_html),
+    ], len(df), len(boundaries["features"])
+
+def time_stage(function, repeats: int) -> dict:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"best_s": min(times), "mean_s": sum(times) / len(times), "repeats": repeats}
+
+def get_environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "packages": {"pandas": pd.__version__, "numpy": np.__version__, "shapely": shapely.__version__, "folium": folium.__version__},
+    }
+
+def compare_with_baseline(results: list, baseline_path: str, threshold: float) -> list:
+    '''Returns the results whose best time is more than threshold times the baseline's best time for the same stage and size.'''
+    with open(baseline_path, "r") as file:
+        baseline = {(result["stage"], result["size"]): result for result in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["stage"], result["size"]))
+        if previous is None or result.get("skipped") or previous.get("skipped"):
+            continue
+        ratio = result["best_s"] / previous["best_s"]
+        if ratio > threshold:
+            regressions.append({**result, "baseline_best_s": previous["best_s"], "ratio": ratio})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the pipeline stages on real and synthetic data and store the results as JSON.")
+    parser.add_argument("--sizes", nargs="+", default=["real", "10000", "100000"], help='"real" or a number of synthetic languages.')
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>_<time>.json).")
+    parser.add_argument("--baseline", help="Earlier results file to check for regressions.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slow-down factor counted as a regression.")
+    args = parser.parse_args()
+
+    environment = get_environment()
+    results = []
+    print(f"{'size':>7} {'languages':>9} {'features':>8} {'stage':<34} {'best (s)':>9} {'mean (s)':>9}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for size in args.sizes:
+            stages, language_count, feature_count = create_stages(*get_data_paths(size), cache_dir)
+            for name, row_wise, function in stages:
+                result = {"stage": name, "size": size, "languages": language_count, "features": feature_count}
+                if row_wise and language_count > ROW_WISE_MAX_ROWS:
+                    results.append({**result, "skipped": True})
+                    print(f"{size:>7} {language_count:>9} {feature_count:>8} {name:<34} {'skipped':>9}")
+                    continue
+                result.update(time_stage(function, args.repeats))
+                results.append(result)
+                print(f"{size:>7} {language_count:>9} {feature_count:>8} {name:<34} {result['best_s']:>9.3f} {result['mean_s']:>9.3f}")
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f"{environment['git_commit'] or 'unknown'}_{environment['created'].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as file:
+        json.dump({**environment, "results": results}, file, indent=1)
+    print(f"Results written to {output_path}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']} at {regression['size']}: {regression['best_s']:.3f}s vs {regression['baseline_best_s']:.3f}s ({regression['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than {args.threshold}x the baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+'''Synthetic data generator for the benchmarks: scales the clean language dataset and the ADM1 boundaries up to any number of languages.
+Languages are resampled from the real dataset with jittered coordinates, fresh IDs and names, and raw speaker strings whose
+numbers are redrawn at a similar magnitude (so "(4,200 cited 1998)[1]" becomes e.g. "(3,870 cited 1998)[1]"). The cleaned
+and derived columns are then recomputed with the real pipeline. Provinces are cut into grid pieces, roughly one per
+LANGUAGES_PER_PIECE languages, to stand in for ADM2/ADM3 boundaries.
+Run from the assessment-2 directory: python -m benchmarks.synthetic_data --languages 10000 100000'''
+import argparse
+import json
+import math
+import os
+import re
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape, mapping
+from Analyser import Analyser
+from DataLoader import DataLoader
+from Processor import Processor
+
+LANGUAGE_DATA_PATH = "data/language_speaker_data_clean.csv"
+BOUNDARIES_PATH = "data/geoBoundaries-PNG-ADM1.geojson"
+LANGUAGES_PER_PIECE = 16 # the real data has ~350 languages over 22 provinces
+COORDINATE_JITTER_DEGREES = 0.3
+# numbers in a raw speaker string, except citation markers like [1] and four-digit years
+NUMBER_PATTERN = re.compile(r"(?<!\[)(?<![\d,])(?!(?:19|20)\d\d(?![\d,]))\d[\d,]*(?![\d,]*\])")
+
+def redraw_number(match: re.Match, rng: np.random.Generator) -> str:
+    '''Replaces one number with a random one within a factor of two of it, keeping the thousands separators if it had any.'''
+    text = match.group(0)
+    value = int(text.replace(",", ""))
+    redrawn = max(1, int(round(value * 2 ** rng.uniform(-1, 1))))
+    return f"{redrawn:,}" if "," in text else str(redrawn)
+
+def generate_languages(language_count: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a clean language dataset of the given size by resampling the real one.
+
+    Args:
+        language_count (int): Number of synthetic languages.
+        seed (int, optional): Random seed, so every run benchmarks the same data. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Dataset with the same columns as language_speaker_data_clean.csv.
+    """
+    rng = np.random.default_rng(seed)
+    data_loader = DataLoader()
+    real_df = data_loader.load_data_from_csv(LANGUAGE_DATA_PATH)
+    df = real_df.iloc[rng.integers(0, len(real_df), language_count)].reset_index(drop=True)
+
+    df["language_ID"] = [f"synt{index:07d}" for index in range(language_count)]
+    df["language"] = df["language"] + " " + pd.Series(range(language_count)).astype(str)
+    df["latitude"] = df["latitude"] + rng.normal(0, COORDINATE_JITTER_DEGREES, language_count)
+    df["longitude"] = df["longitude"] + rng.normal(0, COORDINATE_JITTER_DEGREES, language_count)
+    df["speaker_number_raw"] = [
+        NUMBER_PATTERN.sub(lambda match: redraw_number(match, rng), raw) if isinstance(raw, str) else raw
+        for raw in df["speaker_number_raw"]
+    ]
+
+    df = Processor().clean_speaker_numbers(df)
+    df = Analyser().create_derived_columns(df)
+    extinct = df["vitality_status"].isin(["extinct", "dormant"])
+    df.loc[extinct, "plotting_data"] = pd.to_numeric(df["speaker_number_numeric"]).min() - 0.5
+    return df[real_df.columns]
+
+def generate_boundaries(language_count: int) -> dict:
+    """
+    Cuts each ADM1 province into grid pieces so that there is roughly one boundary feature per LANGUAGES_PER_PIECE languages.
+
+    Args:
+        language_count (int): Number of languages the boundaries are generated for.
+
+    Returns:
+        dict: GeoJSON FeatureCollection whose features have a unique shapeName, like the real boundaries.
+    """
+    geo_data = DataLoader().load_data_from_json(BOUNDARIES_PATH)
+    features = geo_data["features"]
+    pieces_per_province = max(1, language_count / LANGUAGES_PER_PIECE / len(features))
+    grid_size = math.ceil(math.sqrt(pieces_per_province))
+
+    synthetic_features = []
+    for feature in features:
+        province = shape(feature["geometry"])
+        west, south, east, north = province.bounds
+        x_edges = np.linspace(west, east, grid_size + 1)
+        y_edges = np.linspace(south, north, grid_size + 1)
+        boxes = shapely.box(
+            np.repeat(x_edges[:-1], grid_size), np.tile(y_edges[:-1], grid_size),
+            np.repeat(x_edges[1:], grid_size), np.tile(y_edges[1:], grid_size),
+        )
+        pieces = shapely.intersection(province, boxes)
+        for index, piece in enumerate(pieces[~shapely.is_empty(pieces)]):
+            properties = dict(feature["properties"], shapeName=f"{feature['properties']['shapeName']} {index + 1}")
+            synthetic_features.append({"type": "Feature", "properties": properties, "geometry": mapping(piece)})
+    return {"type": "FeatureCollection", "features": synthetic_features}
+
+def write_synthetic_data(language_count: int, output_dir: str, seed: int = 0) -> tuple:
+    '''Writes languages_<n>.csv and boundaries_<n>.geojson to output_dir and returns their paths.'''
+    data_loader = DataLoader()
+    os.makedirs(output_dir, exist_ok=True)
+    language_path = os.path.join(output_dir, f"languages_{language_count}.csv")
+    boundaries_path = os.path.join(output_dir, f"boundaries_{language_count}.geojson")
+    data_loader.write_df_to_csv(generate_languages(language_count, seed), language_path)
+    with open(boundaries_path, "w") as file:
+        json.dump(generate_boundaries(language_count), file)
+    return language_path, boundaries_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic language datasets and boundaries for the benchmarks.")
+    parser.add_argument("--languages", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--output-dir", default="benchmarks/data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for language_count in args.languages:
+        language_path, boundaries_path = write_synthetic_data(language_count, args.output_dir, args.seed)
+        print(f"Wrote {language_path} and {boundaries_path}")
+
+if __name__ == "__main__":
+    main()
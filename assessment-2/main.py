@@ -2,89 +2,110 @@ from Visualiser import Visualiser
 from DataLoader import DataLoader
 from Analyser import Analyser
 from Processor import Processor
+from BoundaryPreparer import BoundaryPreparer
+from SpatialGridIndex import SpatialGridIndex
+from SpeakerRangeIndex import SpeakerRangeIndex
+from Tracer import TRACER
+from LanguageSearchIndex import LanguageSearchIndex
 import altair as alt
+import os
+import streamlit as st
+
+LANGUAGE_SPEAKER_CSV_PATH = 'assessment-2/data/language_speaker_data_clean.csv'
+LANGUAGE_SPEAKER_DATA_PATH = 'assessment-2/data/language_speaker_data_clean.parquet'
+BOUNDARIES_DATA_PATH = 'assessment-2/data/geoBoundaries-PNG-ADM1.geojson'
+BOUNDARIES_CACHE_DIR = 'assessment-2/cache/boundaries'
+
+# Streamlit reruns main() on every widget interaction. The loaders below are cached on the file path
+# and its modification time, so a rerun only reloads data when the file on disk has changed.
+
+@st.cache_data
+def load_language_speaker_data(data_address: str, modified_time: float):
+    '''Loads the clean language data (without the links lists, which the dashboard does not use) with the map marker colour and tooltip columns precomputed.'''
+    language_speaker_data = DataLoader().load_dataset(data_address, skip_list_columns=True)
+    return Visualiser(Analyser()).create_marker_style_columns(language_speaker_data)
+
+@st.cache_resource
+def load_spatial_index(data_address: str, modified_time: float) -> SpatialGridIndex:
+    '''Grid index over the language coordinates, for the map's viewport rendering mode.'''
+    language_speaker_data = load_language_speaker_data(data_address, modified_time)
+    return SpatialGridIndex(language_speaker_data['latitude'], language_speaker_data['longitude'])
+
+@st.cache_resource
+def load_speaker_range_index(data_address: str, modified_time: float) -> SpeakerRangeIndex:
+    '''Sorted speaker number range index for the slider filter; its memoized slider queries are kept across reruns.'''
+    language_speaker_data = load_language_speaker_data(data_address, modified_time)
+    return SpeakerRangeIndex(language_speaker_data['speaker_number_min'], language_speaker_data['speaker_number_max'])
+
+@st.cache_resource
+def load_language_search_index(data_address: str, modified_time: float) -> LanguageSearchIndex:
+    '''Name, glottocode and dialect-name index for the language search. Reads the links lists, which the cached dashboard data leaves out.'''
+    data_loader = DataLoader()
+    language_speaker_data = data_loader.load_dataset(data_address)
+    return LanguageSearchIndex(language_speaker_data['language'], language_speaker_data['language_ID'], data_loader.parse_list_column(language_speaker_data['links']))
+
+@st.cache_resource
+def load_boundaries_data(data_address: str, modified_time: float) -> dict:
+    '''Cached as a resource: the 3.8 MB GeoJSON dict is shared between reruns rather than copied.'''
+    return DataLoader().load_data_from_json(data_address)
+
+@st.cache_resource
+def load_display_boundaries(data_address: str, modified_time: float) -> dict:
+    '''Simplified, quantized boundaries for drawing the choropleth (built once and cached on disk by BoundaryPreparer).'''
+    return BoundaryPreparer(BOUNDARIES_CACHE_DIR).prepare(data_address)
+
+@st.cache_data
+def load_province_language_mapping(boundaries_address: str, boundaries_modified_time: float, language_data_address: str, language_data_modified_time: float):
+    boundaries_data = load_boundaries_data(boundaries_address, boundaries_modified_time)
+    language_speaker_data = load_language_speaker_data(language_data_address, language_data_modified_time)
+    return Analyser().build_province_language_mapping(boundaries_data, language_speaker_data)
+
+@st.cache_resource
+def load_choropleth_boundaries(boundaries_address: str, boundaries_modified_time: float, language_data_address: str, language_data_modified_time: float) -> dict:
+    '''Display boundaries joined with the per-province language counts. Built once per data version and shared read-only between reruns.'''
+    display_boundaries = load_display_boundaries(boundaries_address, boundaries_modified_time)
+    language_mapping = load_province_language_mapping(boundaries_address, boundaries_modified_time, language_data_address, language_data_modified_time)
+    return Visualiser(Analyser()).create_enriched_boundaries(display_boundaries, language_mapping)
 
 def main():
     data_loader = DataLoader()
     analyser = Analyser()
     processor = Processor()
     visualiser = Visualiser(analyser)
-    # """ 
-    # language_location_data = data_loader.load_data_from_json("data/PNG_all_languages_coordinate_data.geojson")
-    # df = processor.convert_json_to_df(language_location_data, 'features')
-  
-    # columns_mapping = {
-    #     'properties.language.id': 'language_ID',
-    #     'properties.language.name': 'language',
-    #     'properties.language.latitude': 'latitude',
-    #     'properties.language.longitude': 'longitude',
-    #     'properties.language.jsondata.links': 'links',
-    # }
-    # df = processor.rename_columns(df, columns_mapping)
-    # selected_columns = ['language_ID', 'language', 'latitude', 'longitude', 'links']
-    # df = processor.create_new_dataframe_with_selected_columns(df, selected_columns)
-    #df = processor.replace_url_in_values_in_column(df, 'https://endangeredlanguages.com/lang/', 'https://www.endangeredlanguages.com/elp-language/')
-   
-    # final_df, languages_without_speaker_number = data_loader.orchestrate_data_scraping_per_domain_name(
-    #     df, 
-    #     'endangeredlanguages.com',
-    #     'speaker-number-value',
-    #     'secondary',
-    #     'expert-curated',
-    #     'direct',
-    #     vitality_status_html_field= 'vitality',
-    #     vitality_certainty_html_field= 'certainty') #placeholders
-    # final_df, languages_without_speaker_number = data_loader.orchestrate_data_scraping_per_domain_name(
-    #     final_df, 
-    #     'wikipedia.org',
-    #     "infobox-label", 
-    #     'tertiary',
-    #     'community-curated',
-    #     'direct',
-    #     string_expression = "Native speakers", 
-    #     attribute1 = "th", 
-    #     attribute2 = "td", 
-    #     method_called_after_label_identified="find_next_sibling")
-    # final_df, languages_without_speaker_number = data_loader.orchestrate_data_scraping_per_domain_name(
-    #     final_df,
-    #     'apics-online.info',
-    #     'key',
-    #     'secondary',
-    #     'expert-curated',
-    #     'direct',
-    #     string_expression = "Number of speakers", 
-    #     attribute1 = "td", 
-    #     method_called_after_label_identified="find_next_sibling"
-
-    # )
-    
-    
-    # data_loader.write_df_to_csv(final_df, 'data/language_speaker_data__.csv') #code required to create the original dataframe (collecting data from websites)
-    # """
-
-    #DATA CLEANING
-      
-    #language_speaker_data = language_speaker_data.apply(processor.clean_speaker_number, axis=1)
-    #language_speaker_data = language_speaker_data.apply(analyser.calculate_source_confidence, axis=1)
-   
-    #language_speaker_data = analyser.create_plotting_data_column(language_speaker_data)
-
-    #language_speaker_data = analyser.create_tooltip_column_for_barchart(language_speaker_data)
-    #data_loader.write_df_to_csv(language_speaker_data, 'assessment-2/data/language_speaker_data_clean.csv')
-    language_speaker_data = data_loader.load_data_from_csv('assessment-2/data/language_speaker_data_clean.csv') 
-    boundaries_data = data_loader.load_data_from_json('assessment-2/data/geoBoundaries-PNG-ADM1.geojson')
-    language_mapping = data_loader.load_data_from_csv('assessment-2/data/province_language_mapping.csv')
+    trace_run_id = TRACER.start_run() # no-op unless PNG_DASHBOARD_TRACE=1; spans are kept per session rerun
+    # The dataset is built from the Glottolog GeoJSON and the scraped pages by the pipeline runner, outside the dashboard:
+    #   python Pipeline.py (from assessment-2; see python Pipeline.py --help for --from/--until)
+    with TRACER.span("load data"):
+        # the Parquet dataset is written by Pipeline.py (python Pipeline.py --migrate-csv converts the CSV); the app only reads
+        language_data_path = LANGUAGE_SPEAKER_DATA_PATH if os.path.exists(LANGUAGE_SPEAKER_DATA_PATH) else LANGUAGE_SPEAKER_CSV_PATH
+        language_data_modified_time = os.path.getmtime(language_data_path)
+        boundaries_modified_time = os.path.getmtime(BOUNDARIES_DATA_PATH)
+        language_speaker_data = load_language_speaker_data(language_data_path, language_data_modified_time)
+        choropleth_boundaries = load_choropleth_boundaries(BOUNDARIES_DATA_PATH, boundaries_modified_time, language_data_path, language_data_modified_time)
+        language_mapping = load_province_language_mapping(BOUNDARIES_DATA_PATH, boundaries_modified_time, language_data_path, language_data_modified_time)
      #VISUALISATIONS
     visualiser.show_title("Language Speaker Data Visualisation for Papua New Guinea")
     filter_map = visualiser.create_map("Geographical Speaker Distribution", "Hover over each point to learn more about the language.", language_speaker_data)
-    visualiser.display_filtered_map(language_speaker_data, filter_map)
-    visualiser.search_for_language(language_speaker_data, filter_map)
-    filtered_df = visualiser.display_map(filter_map, 'filtered_language_map.html')
-    choropleth_map = visualiser.create_map("Number of Languages Spoken by Province", "Hover over each province to see how many languages are spoken there.", language_speaker_data)
-    visualiser.create_choropleth(boundaries_data, language_mapping, choropleth_map)
-    visualiser.display_map(choropleth_map,'choropleth_map.html')
+    with TRACER.span("filtered map"):
+        spatial_index = load_spatial_index(language_data_path, language_data_modified_time)
+        speaker_range_index = load_speaker_range_index(language_data_path, language_data_modified_time)
+        visualiser.display_filtered_map(language_speaker_data, filter_map, spatial_index, speaker_range_index)
+        search_index = load_language_search_index(language_data_path, language_data_modified_time)
+        visualiser.search_for_language(language_speaker_data, filter_map, search_index)
+        if visualiser.viewport_rendering:
+            visualiser.display_viewport_map(filter_map)
+        else:
+            visualiser.display_map(filter_map, cache_key=visualiser.filtered_map_cache_key(language_data_modified_time), add_layers=visualiser.add_filtered_map_layers)
+    with TRACER.span("choropleth map"):
+        choropleth_map = visualiser.create_map("Number of Languages Spoken by Province", "Hover over each province to see how many languages are spoken there.", language_speaker_data)
+        visualiser.create_choropleth(choropleth_boundaries, language_mapping, choropleth_map)
+        visualiser.display_map(choropleth_map, cache_key=("choropleth_map", boundaries_modified_time, language_data_modified_time))
     visualiser.show_logarithmic_bar_graph(language_speaker_data)
 
+    if TRACER.enabled:
+        visualiser.show_performance_panel(TRACER, trace_run_id)
+        TRACER.export(trace_run_id)
+
 if __name__ == "__main__":
     main()
    